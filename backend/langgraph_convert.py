@@ -11,6 +11,10 @@ from langchain_core.pydantic_v1 import BaseModel, Field
 from langgraph.graph import StateGraph, START, END
 import re
 import asyncio
+from src.config.llm_cache import install_llm_cache
+
+# RunnableParallel re-runs hit the shared on-disk LLM cache
+install_llm_cache()
 
 # -------------------------------------------------------------
 # 0) Load transcript
@@ -2,15 +2,28 @@ print("BIOHACKING AGENT")
 
 import os
 from contextlib import AsyncExitStack, asynccontextmanager
-from typing import Literal, Dict, List, Optional
+import asyncio
+from typing import Any, Literal, Dict, List, Optional
 
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field 
 from dotenv import load_dotenv
 
-from src.mongo_schema_overwrite import init_beanie_with_pymongo, Episode, Transcript 
+from src.mongo_schema_overwrite import Episode, Transcript 
+from src.config.mongo_setup import init_beanie_with_pymongo
+from config.settings import get_settings
+from src.jobs.job_runner import Job, JobRunner, JobProgress
+from src.ingestion.utils.transcript_to_document import clean_transcript as fetch_transcript_text
+from src.ingestion.utils.transcript_storage import load_full_transcript
+from src.ingestion.utils.content_hash import content_hash, version_hash
+from src.config.llm_cache import install_llm_cache, llm_cache_stats
+from src.config.llm_rate_limit import PROVIDER_GOOGLE, rate_limited, rate_limit_stats
+from src.config.fake_llm import fake_llm_enabled, make_fake_chat_model
+from src.ingestion.indexing.map_reduce import condense_transcript, use_map_reduce
 from scraping_ops.find_episodes_selenium import update_episodes_url_selenium
 from webpage_parsing.episode_enhacement_pipeline import enhance_episodes_by_ids, enhance_all_episodes 
+from webpage_parsing.store_transcript_links import process_all_missing_transcripts
 
 # MCP server & client pieces
 from mcp_server import mcp  # FastMCP(name="BiohackAgent", streamable_http_path="/")
@@ -41,7 +54,15 @@ async def combined_lifespan(app: FastAPI):
 
         # Your app startup (DB, caches, etc.)
         app.state.mongo_client = await init_beanie_with_pymongo() 
-        app.state.google_llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", api_key=os.getenv("GOOGLE_FREE_API_KEY"))
+        app.state.llm_cache = install_llm_cache()
+        if fake_llm_enabled():
+            app.state.google_llm = make_fake_chat_model("gemini-2.0-flash")
+        else:
+            app.state.google_llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", api_key=os.getenv("GOOGLE_FREE_API_KEY"))
+
+        # Background jobs share the app's event loop; bounded by worker slots
+        app.state.job_runner = JobRunner(max_workers=get_settings().job_runner_max_workers)
+        stack.push_async_callback(app.state.job_runner.shutdown)
 
         # Do NOT self-connect an MCP client during startup
         yield
@@ -76,10 +97,15 @@ class JobTrigger(BaseModel):
     wait: bool = Field(default=False)
 
     # job runtime params
-    mode: Literal["all", "ids"] = "all"
+    mode: Literal["all", "ids", "retry-failed"] = "all"
     concurrency: int = 10
+    max_concurrency: int = 64
+    adaptive: bool = True
+    time_budget_s: Optional[float] = None
     only_missing_youtube: bool = False
     episode_ids: Optional[List[str]] = None
+    stage: Optional[str] = None  # retry-failed: only this pipeline stage
+    limit: Optional[int] = None  # retry-failed: max dead-letter entries
     extra_env: Optional[Dict[str, str]] = None  # optional additional env
 
 
@@ -99,19 +125,55 @@ def open_mcp_session():
     """
     return streamablehttp_client(MCP_BASE)
 
+# ---------------------------------------------------------------------------
+# Helper: stream a job's progress events as SSE or NDJSON
+# ---------------------------------------------------------------------------
+StreamFormat = Literal["sse", "ndjson"]
+
+def stream_job_events(job: Job, fmt: StreamFormat = "ndjson") -> StreamingResponse:
+    """
+    Stream per-item progress events (started / ok / error with timings) until the job ends.
+    Heartbeats are sent during quiet periods so proxies keep the connection open.
+    """
+    async def _body():
+        async for event in job.progress.stream():
+            if fmt == "sse":
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+            else:
+                payload = event if event is not None else {"type": "heartbeat"}
+                yield json.dumps(payload, default=str) + "\n"
+
+    media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Job-Id": job.id}
+    return StreamingResponse(_body(), media_type=media_type, headers=headers)
+
 # ---------------------------------------------------------------------------
 # Routes
 # --------------------------------------------------------------------------- 
 
 def _build_overrides(p: JobTrigger) -> run_v2.RunJobRequest.Overrides:
-    args = ["python", "-m", "webpage_parsing.job_cli", f"--mode={p.mode}", f"--concurrency={p.concurrency}"]
+    args = ["python", "-m", "webpage_parsing.job_cli", f"--mode={p.mode}", f"--concurrency={p.concurrency}",
+            f"--max-concurrency={p.max_concurrency}"]
     env_vars = []
 
+    if not p.adaptive:
+        args.append("--no-adaptive")
+    if p.time_budget_s:
+        args.append(f"--time-budget={p.time_budget_s}")
+
     if p.mode == "all":
         if p.only_missing_youtube:
             args.append("--only-missing-youtube")
-    else:
+    elif p.mode == "ids":
         env_vars.append(run_v2.EnvVar(name="EPISODE_IDS_JSON", value=json.dumps(p.episode_ids or [])))
+    elif p.mode == "retry-failed":
+        if p.stage:
+            args.append(f"--stage={p.stage}")
+        if p.limit is not None:
+            args.append(f"--limit={p.limit}")
 
     if p.extra_env:
         for k, v in p.extra_env.items():
@@ -133,9 +195,12 @@ async def execute_job(p: JobTrigger):
     client = run_v2.JobsClient()
     name = client.job_path(project=p.project_id, location=p.region, job=p.job_name)
     try:
-        op = client.run_job(request=run_v2.RunJobRequest(name=name, overrides=_build_overrides(p)))
+        # The Cloud Run client is blocking; keep it off the event loop
+        op = await asyncio.to_thread(
+            client.run_job, request=run_v2.RunJobRequest(name=name, overrides=_build_overrides(p))
+        )
         if p.wait:
-            resp = op.result()
+            resp = await asyncio.to_thread(op.result)
             state = None
             if resp.latest_created_execution and resp.latest_created_execution.completion_status:
                 state = resp.latest_created_execution.completion_status.state.name
@@ -155,6 +220,16 @@ async def update_episodes(request: Request, update_data: UpdateRequest):
     return {"message": "Update not requested"} 
 
 
+@app.post("/add_episodes_selenium/stream")
+async def update_episodes_stream(request: Request, format: StreamFormat = "ndjson"):
+    """Run discovery as a background job and stream each discovered episode URL as it is stored."""
+    job = request.app.state.job_runner.submit(
+        "discover_episodes",
+        lambda progress: update_episodes_url_selenium(request.app.state.mongo_client, progress=progress),
+    )
+    return stream_job_events(job, format)
+
+
 
 @app.post("/ingest_transcript")
 async def ingest_transcript(request: Request):
@@ -189,11 +264,19 @@ async def summarize_episode_dump(request: Request, body: SummarizeEpisodeDumpReq
 async def find_episodes_with_full_transcript_and_timeline() -> List[Episode]:
     # 1) Get qualifying transcript ids 
     await init_beanie_with_pymongo() 
-    transcripts = await Transcript.find({
-        "full_transcript": {"$exists": True, "$ne": None},
-        "timeline": {"$exists": True, "$ne": None},
-    }).to_list()
-    transcript_ids = [t.id for t in transcripts if getattr(t, "id", None) is not None]
+    # Only _id is projected: raw text lives in transcript_bodies (or, before
+    # migration, inline) and is not needed to pick episodes
+    cursor = Transcript.get_pymongo_collection().find(
+        {
+            "$or": [
+                {"full_transcript_body_id": {"$ne": None}},
+                {"full_transcript": {"$exists": True, "$ne": None}},
+            ],
+            "timeline": {"$exists": True, "$ne": None},
+        },
+        {"_id": 1},
+    )
+    transcript_ids = [doc["_id"] async for doc in cursor]
     if not transcript_ids:
         return []
 
@@ -235,8 +318,16 @@ async def episode_summaries(request: Request, episode_request: EpisodeSummary):
         }
   
 
-@app.post("/summarize_transcripts")
-async def summarize_transcripts(request: Request):
+async def summarize_episodes(
+    google_llm: ChatGoogleGenerativeAI,
+    *,
+    limit: int = 30,
+    progress: Optional[JobProgress] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Write Episode.master_summary for the most recent eligible episodes.
+    Returns per-episode results, or None when nothing is eligible.
+    """
     async with open_mcp_session() as (read_stream, write_stream, _):
         async with ClientSession(read_stream, write_stream) as session: 
             await session.initialize()
@@ -246,14 +337,32 @@ async def summarize_transcripts(request: Request):
                 "transcript": {"$exists": True, "$ne": None},
                 "timeline": {"$exists": True, "$ne": None},
                 "webpage_summary": {"$exists": True, "$ne": None},
-            }).sort("-episode_number").limit(30).to_list()
+            }).sort("-episode_number").limit(limit).to_list()
 
             if not episodes:
-                return {"message": "No eligible episodes found to summarize."}
+                return None
+
+            if progress is not None:
+                progress.set_total(len(episodes))
+
+            # Prompt template (rendered with empty inputs) + model identify the summary version
+            template_prompt = await session.get_prompt(
+                "transcript_summary",
+                {"full_transcript": "", "timeline": "", "high_level_overview": ""},
+            )
+            summary_version = version_hash(
+                template_prompt.messages[0].content.text,
+                getattr(google_llm, "model", None),
+            )
+
+            # Map and master-summary calls share the process-wide Gemini budget
+            limited_llm = rate_limited(google_llm, PROVIDER_GOOGLE)
 
             results = []
 
             for episode in episodes:  
+                if progress is not None:
+                    progress.item_started(episode.episode_number)
                 try:
                     timeline = episode.timeline or []
                     timeline_string = "\n".join([
@@ -275,12 +384,14 @@ async def summarize_transcripts(request: Request):
                     if not transcript_text and episode.transcript is not None:
                         try:
                             linked_transcript = await episode.transcript.fetch()
-                            transcript_text = linked_transcript.full_transcript or ""
+                            transcript_text = await load_full_transcript(linked_transcript) or ""
                         except Exception as e:
                             print(f"Error fetching linked transcript for episode {episode.episode_number}: {e}")
 
                     if not transcript_text:
                         print(f"No transcript text for episode {episode.episode_number}; skipping")
+                        if progress is not None:
+                            progress.item_finished(episode.episode_number, LookupError("no transcript text"))
                         continue
 
                     print("Fetched transcript text", transcript_text[:200])
@@ -289,6 +400,27 @@ async def summarize_transcripts(request: Request):
                     full_transcript = transcript_text
                     high_level_overview = episode.webpage_summary or ""
 
+                    inputs_hash = content_hash("\n".join([full_transcript, timeline_string, high_level_overview]))
+                    if (
+                        episode.master_summary
+                        and episode.master_summary_content_hash == inputs_hash
+                        and episode.master_summary_version_hash == summary_version
+                    ):
+                        print(f"Episode {episode.episode_number} unchanged since last summary; skipping")
+                        results.append({
+                            "episode_id": str(getattr(episode, 'id', '')),
+                            "episode_number": episode.episode_number,
+                            "status": "skipped",
+                        })
+                        if progress is not None:
+                            progress.item_finished(episode.episode_number)
+                        continue
+
+                    # Long episodes: summarize timeline-aligned chunks in parallel, then
+                    # feed the ordered notes to the master prompt instead of the raw text
+                    if use_map_reduce(transcript_text):
+                        full_transcript = await condense_transcript(limited_llm, transcript_text, timeline)
+
                     transcript_prompt = await session.get_prompt(
                         "transcript_summary",
                         {
@@ -303,12 +435,13 @@ async def summarize_transcripts(request: Request):
 
                     # Simple passthrough template to feed full prompt string
                     transcript_prompt_template = PromptTemplate.from_template(prompt_text)
-                    google_llm = request.app.state.google_llm
-                    chain = transcript_prompt_template | google_llm | StrOutputParser()
+                    chain = transcript_prompt_template | limited_llm | StrOutputParser()
 
                     result = await chain.ainvoke({"input": "Start summarization process"}) 
 
                     episode.master_summary = result
+                    episode.master_summary_content_hash = inputs_hash
+                    episode.master_summary_version_hash = summary_version
                     await episode.save()
                     print('Episode saved with new master_summary')
                     results.append({
@@ -316,6 +449,8 @@ async def summarize_transcripts(request: Request):
                         "episode_number": episode.episode_number,
                         "status": "ok",
                     })
+                    if progress is not None:
+                        progress.item_finished(episode.episode_number)
                 except Exception as e:
                     print(f"Error summarizing episode {episode.episode_number}: {e}")
                     results.append({
@@ -324,10 +459,126 @@ async def summarize_transcripts(request: Request):
                         "status": "error",
                         "error": str(e),
                     })
+                    if progress is not None:
+                        progress.item_finished(episode.episode_number, e)
+
+            return results
+
+
+@app.post("/summarize_transcripts")
+async def summarize_transcripts(request: Request):
+    results = await summarize_episodes(request.app.state.google_llm)
+    if results is None:
+        return {"message": "No eligible episodes found to summarize."}
+    return {"message": "Summarization run complete", "results": results}
+
+
+@app.post("/summarize_transcripts/stream")
+async def summarize_transcripts_stream(request: Request, format: StreamFormat = "ndjson", limit: int = 30):
+    """Same as /summarize_transcripts, but streams per-episode events while it runs."""
+    job = request.app.state.job_runner.submit(
+        "summarize",
+        lambda progress: summarize_episodes(request.app.state.google_llm, limit=limit, progress=progress),
+        {"limit": limit},
+    )
+    return stream_job_events(job, format)
+
+
+# ---------------------------------------------------------------------------
+# In-process background jobs (local alternative to /jobs/execute)
+# ---------------------------------------------------------------------------
+class LocalJobRequest(BaseModel):
+    kind: Literal["enhance", "transcript_backfill", "summarize", "discover_episodes", "ingest_transcripts"]
+    concurrency: int = 10
+    max_concurrency: int = 64
+    only_missing_youtube: bool = False
+    time_budget_s: Optional[float] = None
+    limit: Optional[int] = None
+    # ingest_transcripts: None = every episode with a transcript_url
+    episode_numbers: Optional[List[int]] = None
+    force: bool = False
+
+
+def _local_job_fn(app: FastAPI, p: LocalJobRequest):
+    if p.kind == "enhance":
+        return lambda progress: enhance_all_episodes(
+            concurrency=p.concurrency,
+            max_concurrency=p.max_concurrency,
+            filter_only_missing_youtube=p.only_missing_youtube,
+            time_budget_s=p.time_budget_s,
+            progress=progress,
+        )
+    if p.kind == "transcript_backfill":
+        return lambda progress: process_all_missing_transcripts(
+            app.state.mongo_client, p.limit, progress=progress
+        )
+    if p.kind == "ingest_transcripts":
+        # Imported on demand: the ingestion graph builds its LLM clients at import time
+        from src.ingestion.indexing.batch_ingestion import run_batch_ingestion
+
+        return lambda progress: run_batch_ingestion(
+            p.episode_numbers,
+            client=app.state.mongo_client,
+            concurrency=p.concurrency,
+            force=p.force,
+            progress=progress,
+        )
+    if p.kind == "discover_episodes":
+        return lambda progress: update_episodes_url_selenium(app.state.mongo_client, progress=progress)
+    return lambda progress: summarize_episodes(
+        app.state.google_llm, limit=p.limit or 30, progress=progress
+    )
+
+
+@app.post("/jobs", status_code=202)
+async def submit_local_job(request: Request, p: LocalJobRequest):
+    runner: JobRunner = request.app.state.job_runner
+    job = runner.submit(p.kind, _local_job_fn(request.app, p), p.model_dump())
+    return job.to_dict()
+
+
+@app.get("/jobs")
+async def list_local_jobs(request: Request):
+    runner: JobRunner = request.app.state.job_runner
+    return {"jobs": [j.to_dict() for j in runner.list()]}
+
+
+@app.get("/jobs/{job_id}")
+async def get_local_job(request: Request, job_id: str):
+    job = request.app.state.job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def local_job_events(request: Request, job_id: str, format: StreamFormat = "sse"):
+    job = request.app.state.job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return stream_job_events(job, format)
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_local_job(request: Request, job_id: str):
+    runner: JobRunner = request.app.state.job_runner
+    job = runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if not runner.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is already {job.status.value}")
+    return {"id": job_id, "status": "cancelling"}
+
 
-            return {"message": "Summarization run complete", "results": results}
+@app.get("/llm_cache/stats")
+async def get_llm_cache_stats():
+    stats = llm_cache_stats()
+    return stats or {"enabled": False}
 
 
+@app.get("/llm_rate_limit/stats")
+async def get_llm_rate_limit_stats():
+    return rate_limit_stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import queue
+import threading
+from typing import Any, AsyncIterator, Callable, List, Optional, Set
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+EPISODE_LINK_SELECTOR = "h3.elementor-post__title a"
+BUTTON_WRAPPER_SELECTOR = "div.elementor-button-wrapper"
+
+_CMD_MORE = "more"
+_CMD_STOP = "stop"
+
+
+class DiscoveryBrowserWorker:
+    """
+    Owns one Selenium session on a dedicated thread.
+
+    The event loop never touches the WebDriver: it iterates `pages()` and gets
+    the hrefs that appeared on each "View More" page. The thread only loads the
+    next page when the consumer asks for it, so the consumer can stop the crawl
+    (e.g. after reaching an episode already in the DB) without extra clicks.
+    Page loads use explicit element waits instead of fixed sleeps.
+    """
+
+    def __init__(
+        self,
+        launch_browser: Callable[[], WebDriver],
+        start_url: str,
+        *,
+        page_timeout_s: float = 30.0,
+        load_more_timeout_s: float = 30.0,
+    ):
+        self._launch_browser = launch_browser
+        self._start_url = start_url
+        self._page_timeout_s = page_timeout_s
+        self._load_more_timeout_s = load_more_timeout_s
+
+        self._commands: "queue.Queue[str]" = queue.Queue()
+        self._pages: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- event-loop side ----------
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._pages = asyncio.Queue()
+        self._thread = threading.Thread(target=self._run, name="selenium-discovery", daemon=True)
+        self._thread.start()
+
+    async def pages(self) -> AsyncIterator[List[str]]:
+        """Yield the new hrefs of each page; asks the browser for the next page on resume."""
+        if self._pages is None:
+            self.start()
+        first = True
+        while True:
+            if not first:
+                self._commands.put(_CMD_MORE)
+            first = False
+            kind, payload = await self._pages.get()
+            if kind == "page":
+                yield payload
+            elif kind == "error":
+                raise payload
+            else:
+                return
+
+    def stop(self) -> None:
+        self._commands.put(_CMD_STOP)
+
+    async def join(self) -> None:
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+
+    # ---------- browser thread ----------
+    def _emit(self, kind: str, payload: Any = None) -> None:
+        self._loop.call_soon_threadsafe(self._pages.put_nowait, (kind, payload))
+
+    def _run(self) -> None:
+        driver: Optional[WebDriver] = None
+        try:
+            driver = self._launch_browser()
+            driver.get(self._start_url)
+            logger.info("✅ Navigated to podcast page: %s", self._start_url)
+            WebDriverWait(driver, self._page_timeout_s).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, EPISODE_LINK_SELECTOR))
+            )
+
+            emitted: Set[str] = set()
+            count = self._emit_new_links(driver, emitted)
+
+            while self._commands.get() == _CMD_MORE:
+                if not self._click_view_more(driver):
+                    logger.info("❌ No View More button found. Ending.")
+                    break
+                try:
+                    WebDriverWait(driver, self._load_more_timeout_s).until(
+                        lambda d: len(d.find_elements(By.CSS_SELECTOR, EPISODE_LINK_SELECTOR)) > count
+                    )
+                except TimeoutException:
+                    logger.info("No new episodes appeared after View More. Ending.")
+                    break
+                count = self._emit_new_links(driver, emitted)
+            self._emit("done")
+        except Exception as e:
+            logger.exception("❌ Browser worker failed: %s", e)
+            self._emit("error", e)
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except WebDriverException:
+                    pass
+            logger.info("Chrome quit. Done.")
+
+    def _emit_new_links(self, driver: WebDriver, emitted: Set[str]) -> int:
+        hrefs = _read_hrefs(driver)
+        new = [h for h in hrefs if h not in emitted]
+        emitted.update(new)
+        self._emit("page", new)
+        return len(hrefs)
+
+    def _click_view_more(self, driver: WebDriver) -> bool:
+        for wrapper in driver.find_elements(By.CSS_SELECTOR, BUTTON_WRAPPER_SELECTOR):
+            try:
+                a_tag = wrapper.find_element(By.CSS_SELECTOR, "a.elementor-button-link")
+                text_span = a_tag.find_element(By.CSS_SELECTOR, "span.elementor-button-text")
+            except WebDriverException:
+                continue
+            if text_span.text.strip().lower() == "view more":
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", a_tag)
+                driver.execute_script("arguments[0].click();", a_tag)
+                logger.info("✅ Clicked View More")
+                return True
+        return False
+
+
+def _read_hrefs(driver: WebDriver) -> List[str]:
+    hrefs: List[str] = []
+    for el in driver.find_elements(By.CSS_SELECTOR, EPISODE_LINK_SELECTOR):
+        try:
+            href = el.get_attribute("href")
+        except StaleElementReferenceException:
+            continue
+        if href:
+            hrefs.append(href)
+    return hrefs
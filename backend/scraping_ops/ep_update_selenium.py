@@ -3,14 +3,19 @@ import re
 import time
 import logging
 import asyncio
-from typing import Optional, Set
+from typing import Dict, List, Optional, Set
 
-from pymongo import AsyncMongoClient  
+from pymongo import AsyncMongoClient
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 
+try:
+    from .episode_url_store import EpisodeUrlStore
+except ImportError:  # run as a script (the image's entrypoint): the module sits next to it
+    from episode_url_store import EpisodeUrlStore
+
 # ---------- Logging ----------
 def setup_logger() -> logging.Logger:
     logger = logging.getLogger("podcast_scraper")
@@ -93,12 +98,16 @@ async def update_episodes_url_selenium(async_mongo_client: AsyncMongoClient):
         logger.info("Most recent in DB -> episode_number: %s, url: %s",
                     max_ep_in_db, latest_url_fallback)
 
+        store = EpisodeUrlStore(col)
+        logger.info("Loaded %d known episode URLs", await store.load())
+
         seen_links: Set[str] = set()
         inserted = 0
 
         while True:
             links = driver.find_elements(By.CSS_SELECTOR, "h3.elementor-post__title a")
-            new_this_cycle = 0
+            page_docs: List[Dict] = []
+            stop_reason: Optional[str] = None
             for el in links:
                 href = el.get_attribute("href")
                 if not href or href in seen_links:
@@ -108,23 +117,24 @@ async def update_episodes_url_selenium(async_mongo_client: AsyncMongoClient):
                 ep_num = extract_episode_number(href)
 
                 if max_ep_in_db is not None and ep_num is not None and ep_num <= max_ep_in_db:
-                    logger.info("✅ Reached existing episode number %s (<= %s). Stopping.",
-                                ep_num, max_ep_in_db)
-                    logger.info("Inserted %d new episodes this run.", inserted)
-                    return
+                    stop_reason = f"Reached existing episode number {ep_num} (<= {max_ep_in_db})."
+                    break
 
                 if max_ep_in_db is None and latest_url_fallback and href == latest_url_fallback:
-                    logger.info("✅ Reached most recent episode URL already in DB. Stopping.")
-                    logger.info("Inserted %d new episodes this run.", inserted)
-                    return
+                    stop_reason = "Reached most recent episode URL already in DB."
+                    break
+
+                if store.is_known(href):
+                    continue
 
                 doc = {"episode_page_url": href}
                 if ep_num is not None:
                     doc["episode_number"] = ep_num
+                page_docs.append(doc)
 
-                await col.insert_one(doc)
-                inserted += 1
-                new_this_cycle += 1
+            # one round trip per page of results
+            new_this_cycle = len(await store.add_page(page_docs))
+            inserted += new_this_cycle
 
             if new_this_cycle:
                 logger.info("✅ Collected %d new links this cycle (total inserted: %d)",
@@ -132,6 +142,11 @@ async def update_episodes_url_selenium(async_mongo_client: AsyncMongoClient):
             else:
                 logger.info("No new links detected on this batch.")
 
+            if stop_reason:
+                logger.info("✅ %s Stopping.", stop_reason)
+                logger.info("Inserted %d new episodes this run.", inserted)
+                return
+
             if any("/1-" in url for url in seen_links):
                 logger.info("✅ Episode 1 pattern found. Ending.")
                 return
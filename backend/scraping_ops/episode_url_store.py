@@ -0,0 +1,72 @@
+import logging
+from typing import Any, Dict, List, Set
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+URL_FIELD = "episode_page_url"
+URL_INDEX_NAME = "episode_page_url_unique"
+DUPLICATE_KEY = 11000
+
+
+async def ensure_episode_url_index(collection) -> bool:
+    """
+    Unique index on episode_page_url (string values only, so legacy docs without
+    a URL don't collide). Returns False if existing duplicates prevent it.
+    """
+    try:
+        await collection.create_index(
+            URL_FIELD,
+            name=URL_INDEX_NAME,
+            unique=True,
+            partialFilterExpression={URL_FIELD: {"$type": "string"}},
+        )
+        return True
+    except OperationFailure as e:
+        logger.warning("Could not create unique %s index (duplicates in collection?): %s", URL_FIELD, e)
+        return False
+
+
+class EpisodeUrlStore:
+    """
+    Idempotent writer for discovered episode page URLs.
+
+    load() pre-fills an in-memory seen-set with one projection query; add_page()
+    writes one page of discoveries as a single unordered bulk of upserts, so
+    overlapping runs cannot create duplicates and each page costs one round trip.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.seen: Set[str] = set()
+
+    async def load(self) -> int:
+        await ensure_episode_url_index(self.collection)
+        cursor = self.collection.find({URL_FIELD: {"$type": "string"}}, {URL_FIELD: 1, "_id": 0})
+        async for doc in cursor:
+            self.seen.add(doc[URL_FIELD])
+        logger.info("Loaded %d known episode URLs", len(self.seen))
+        return len(self.seen)
+
+    def is_known(self, href: str) -> bool:
+        return href in self.seen
+
+    async def add_page(self, docs: List[Dict[str, Any]]) -> List[str]:
+        """Upsert docs keyed by episode_page_url; returns the URLs that were actually new."""
+        docs = [d for d in docs if d.get(URL_FIELD) and d[URL_FIELD] not in self.seen]
+        if not docs:
+            return []
+        ops = [UpdateOne({URL_FIELD: d[URL_FIELD]}, {"$setOnInsert": d}, upsert=True) for d in docs]
+        try:
+            result = await self.collection.bulk_write(ops, ordered=False)
+            upserted = result.upserted_ids  # {op_index: _id}
+        except BulkWriteError as e:
+            # A concurrent run inserted the same URL first; anything else is a real error
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+            upserted = {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+
+        self.seen.update(d[URL_FIELD] for d in docs)
+        return [docs[i][URL_FIELD] for i in sorted(upserted)]
@@ -1,14 +1,16 @@
 import os
-import time
+import asyncio
 import logging
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager  
 # from config.mongo_setup import get_async_mongo_client   
 from pymongo import AsyncMongoClient  
+from src.jobs.job_runner import JobProgress
+from .browser_worker import DiscoveryBrowserWorker
+from .episode_url_store import EpisodeUrlStore
 
 
 
@@ -24,6 +26,7 @@ logger = logging.getLogger(__name__)
 
 # CSV path
 CSV_PATH = "episodes.csv"
+PODCAST_URL = "https://www.daveasprey.com/podcast/"
 
 def launch_browser():
     options = Options()
@@ -35,30 +38,22 @@ def launch_browser():
     return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
 
 def save_to_csv(data, path=CSV_PATH):
+    """Append rows (already deduplicated against the DB) without re-reading the file."""
     df = pd.DataFrame(data, columns=["episode_url"])
-    if os.path.exists(path):
-        existing = pd.read_csv(path)
-        combined = pd.concat([existing, df]).drop_duplicates().reset_index(drop=True)
-        combined.to_csv(path, index=False)
-    else:
-        df.to_csv(path, index=False)
+    df.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
     logger.info(f"✅ Saved {len(data)} new episodes to {path}")
 
 
 
-async def update_episodes_url_selenium(async_mongo_client: AsyncMongoClient):   
-    driver = launch_browser()
-    driver.get("https://www.daveasprey.com/podcast/")
-    logger.info("✅ Navigated to Dave Asprey podcast page")
-
-    time.sleep(5)  # Allow initial load
-    driver.execute_script("window.scrollBy(0, 1880);")
-    time.sleep(10)
-
-
-    seen_links = set()  
-    updated_episodes = set()   
+async def update_episodes_url_selenium(async_mongo_client: AsyncMongoClient, progress: JobProgress = None):   
+    """
+    Incrementally discover new episode page URLs.
 
+    The browser runs on its own thread (DiscoveryBrowserWorker), so the API
+    event loop keeps serving requests while pages load; CSV writes go to a
+    worker thread as well. Each page of links is written as one bulk upsert
+    keyed on the unique episode_page_url index, so overlapping runs are safe.
+    """
     db = async_mongo_client.biohack_agent 
 
     collection = db.episodes 
@@ -71,72 +66,58 @@ async def update_episodes_url_selenium(async_mongo_client: AsyncMongoClient):
     else:
         most_recent_episode_url = None
 
-    found_most_recent = False
+    store = EpisodeUrlStore(collection)
+    await store.load()
 
-    while True:
-        # Collect all current episode links
-        episode_links = driver.find_elements(By.CSS_SELECTOR, "h3.elementor-post__title a")
-        new_links = []
-        for link in episode_links:
-            href = link.get_attribute("href") 
-            if most_recent_episode_url and href == most_recent_episode_url: 
-                found_most_recent = True 
-                return updated_episodes 
-                 
-            if href and href not in seen_links:
-                seen_links.add(href)
-                new_links.append([href])    
-                updated_episodes.add(href) 
-                await collection.insert_one({
-                    "episode_page_url": href,
-                })
-
-        if new_links:
-            save_to_csv(new_links)  
-            
-            print(f"✅ Collected {len(new_links)} new links this cycle")
-            logger.info(f"Collected {len(new_links)} new links this cycle")
-
-        if found_most_recent:
-            print("✅ Reached most recent episode in DB. Stopping incremental scrape.")
-            logger.info("✅ Reached most recent episode in DB. Stopping incremental scrape.")
-            break
-
-        # Check if Episode 1 is found
-        if any("/1-" in url for url in seen_links):
-            print("✅ Episode 1 found! Exiting loop.")
-            logger.info("✅ Episode 1 found! Ending scrape.")
-            break
-
-        # Locate View More button
-        try:
-            wrappers = driver.find_elements(By.CSS_SELECTOR, "div.elementor-button-wrapper")
-            view_more_btn = None
-            for wrapper in wrappers:
-                a_tag = wrapper.find_element(By.CSS_SELECTOR, "a.elementor-button-link")
-                text_span = a_tag.find_element(By.CSS_SELECTOR, "span.elementor-button-text")
-                if text_span.text.strip().lower() == "view more":
-                    view_more_btn = a_tag
+    seen_links = set()  
+    updated_episodes = set()   
+
+    worker = DiscoveryBrowserWorker(launch_browser, PODCAST_URL)
+    try:
+        async for page_links in worker.pages():
+            # Buffer this page's unseen links, then write them in one round trip
+            page_docs = []
+            reached_known = False
+            for href in page_links:
+                if most_recent_episode_url and href == most_recent_episode_url: 
+                    reached_known = True
                     break
+                if href in seen_links or store.is_known(href):
+                    continue
+                seen_links.add(href)
+                page_docs.append({"episode_page_url": href})
+
+            if progress is not None:
+                for doc in page_docs:
+                    progress.item_started(doc["episode_page_url"])
+            inserted = await store.add_page(page_docs)
+            if progress is not None:
+                for doc in page_docs:
+                    progress.item_finished(doc["episode_page_url"])
+
+            if inserted:
+                updated_episodes.update(inserted)
+                await asyncio.to_thread(save_to_csv, [[href] for href in inserted])  
+                
+                print(f"✅ Collected {len(inserted)} new links this cycle")
+                logger.info(f"Collected {len(inserted)} new links this cycle")
+
+            if reached_known:
+                print("✅ Reached most recent episode in DB. Stopping incremental scrape.")
+                logger.info("✅ Reached most recent episode in DB. Stopping incremental scrape.")
+                return updated_episodes 
 
-            if view_more_btn:
-                driver.execute_script("arguments[0].click();", view_more_btn)
-                logger.info("✅ Clicked View More button")
-                print("Clicked View More button")
-            else:
-                print("❌ No View More button found. Ending loop.")
-                logger.info("❌ No View More button found. Ending loop.")
+            # Check if Episode 1 is found
+            if any("/1-" in url for url in page_links):
+                print("✅ Episode 1 found! Exiting loop.")
+                logger.info("✅ Episode 1 found! Ending scrape.")
                 break
-
-        except Exception as e:
-            logger.error(f"❌ Error clicking View More: {str(e)}")
-            break
-
-        # Scroll down and wait for new content
-        driver.execute_script("window.scrollBy(0, 1880);")
-        time.sleep(8)  # Adjust if needed for slow load
+    finally:
+        worker.stop()
+        await worker.join()
 
     print("✅ Done scraping. Check episodes.csv for results.") 
+    return updated_episodes
 
 
 if __name__ == "__main__":
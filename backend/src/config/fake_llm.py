@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from config.settings import get_settings
+
+LLM_BACKEND_LIVE = "live"
+LLM_BACKEND_FAKE = "fake"
+
+FAKE_RESPONSE_TEMPLATE = (
+    "Fake {model} response to a {chars}-char prompt ({digest}).\n"
+    "- {preview}\n"
+    "<attribution>\"{preview}\" (00:00:00)</attribution>"
+)
+
+
+# Sections requested by the multi-section summary prompt (see section_summaries.py)
+_SECTION_RE = re.compile(r'<section name="(\w+)">')
+
+
+def fake_llm_enabled() -> bool:
+    return get_settings().llm_backend == LLM_BACKEND_FAKE
+
+
+def _prompt_text(messages: Sequence[BaseMessage]) -> str:
+    return "\n".join(m.content if isinstance(m.content, str) else str(m.content) for m in messages)
+
+
+def _fake_value(name: str, schema: Dict[str, Any], digest: str) -> Any:
+    """Deterministic placeholder matching a JSON-schema property."""
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        schema = options[0] if options else {}
+    if "allOf" in schema:
+        schema = schema["allOf"][0]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    kind = schema.get("type")
+    seed = int(digest[:8], 16)
+    if kind == "integer":
+        return seed % 1000
+    if kind == "number":
+        return (seed % 100000) / 100
+    if kind == "boolean":
+        return bool(seed % 2)
+    if kind == "array":
+        item = schema.get("items") or {}
+        if item.get("type") in ("string", "integer", "number") or item.get("properties"):
+            return [_fake_value(name, item, digest)]
+        return []
+    if kind == "object":
+        # Nested models (e.g. the items of a batch tool) get every field filled
+        return {k: _fake_value(k, v, digest) for k, v in (schema.get("properties") or {}).items()}
+    return f"{name} {digest[:6]}"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for the Gemini / Anthropic chat models.
+
+    Replies are derived from a hash of the prompt, so they are identical from
+    run to run: templated text for plain calls, and a tool call (arguments
+    filled from the tool's schema) once tools are bound, and one tagged block
+    per requested section for multi-section summary prompts. Each call sleeps for
+    `latency_s` plus up to `jitter_s`, which lets the pipelines be load-tested
+    without provider quotas or token spend. Never reads from or writes to the
+    LLM cache.
+    """
+
+    model: str = "fake-chat"
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    response_template: str = FAKE_RESPONSE_TEMPLATE
+    tools: List[Dict[str, Any]] = []
+    cache: Union[BaseCache, bool, None] = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "latency_s": self.latency_s, "jitter_s": self.jitter_s}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        return self.model_copy(update={"tools": [convert_to_openai_tool(t) for t in tools]})
+
+    def _delay(self, digest: str) -> float:
+        if not self.jitter_s:
+            return self.latency_s
+        return self.latency_s + random.Random(digest).uniform(0, self.jitter_s)
+
+    def _respond(self, messages: Sequence[BaseMessage]) -> Tuple[AIMessage, str]:
+        prompt = _prompt_text(messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return self._message(prompt, digest), digest
+
+    def _message(self, prompt: str, digest: str) -> AIMessage:
+        if self.tools:
+            function = self.tools[0]["function"]
+            properties = (function.get("parameters") or {}).get("properties") or {}
+            args = {name: _fake_value(name, spec, digest) for name, spec in properties.items()}
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": function["name"], "args": args, "id": f"call_{digest[:12]}", "type": "tool_call"}],
+            )
+        preview = next((line.strip() for line in prompt.splitlines() if line.strip()), "")[:80]
+        content = self.response_template.format(
+            model=self.model, chars=len(prompt), digest=digest[:8], preview=preview,
+        )
+        sections = _SECTION_RE.findall(prompt)
+        if sections:
+            content = "\n".join(f"<{name}>\n{content}\n</{name}>" for name in sections)
+        return AIMessage(content=content)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message, digest = self._respond(messages)
+        time.sleep(self._delay(digest))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message, digest = self._respond(messages)
+        await asyncio.sleep(self._delay(digest))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def make_fake_chat_model(model: str) -> FakeChatModel:
+    """Fake model standing in for `model`, with latency from settings."""
+    settings = get_settings()
+    return FakeChatModel(
+        model=f"{LLM_BACKEND_FAKE}:{model}",
+        latency_s=settings.fake_llm_latency_s,
+        jitter_s=settings.fake_llm_jitter_s,
+    )
+
+
+if __name__ == "__main__":
+    print("importing fake chat model from fake_llm.py")
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from config.settings import get_settings
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    sha256 over LangChain's llm_string (model id, generation params, bound
+    tools) and the rendered prompt, so any change to either is a miss.
+    """
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    On-disk LangChain LLM cache with hit/miss counters.
+
+    Installed globally with `install_llm_cache()`, it serves every chat model
+    call (summary chains, bind_tools extraction, the master-summary chain) whose
+    model, params and rendered prompt were seen before, including across
+    process restarts.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " llm_string TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        try:
+            generations = loads(row[0])
+        except Exception:
+            # Written by an incompatible langchain version; treat as a miss
+            self.misses += 1
+            return None
+        self.hits += 1
+        return generations
+
+    def contains(self, prompt: str, llm_string: str) -> bool:
+        """Whether a lookup would hit, without counting it (used by the rate limiter)."""
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    async def acontains(self, prompt: str, llm_string: str) -> bool:
+        return await asyncio.to_thread(self.contains, prompt, llm_string)
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = cache_key(prompt, llm_string)
+        value = dumps(list(return_val))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_string, value, created_at) VALUES (?, ?, ?, ?)",
+                (key, llm_string, value, time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def install_llm_cache(path: Optional[Union[str, Path]] = None) -> Optional[SQLiteLLMCache]:
+    """
+    Install the SQLite cache as LangChain's global LLM cache (idempotent).
+    Returns None when disabled through LLM_CACHE_ENABLED=false.
+    """
+    settings = get_settings()
+    if not settings.llm_cache_enabled:
+        return None
+    current = get_llm_cache()
+    target = Path(path or settings.llm_cache_path)
+    if isinstance(current, SQLiteLLMCache) and current.path == target:
+        return current
+    cache = SQLiteLLMCache(target)
+    set_llm_cache(cache)
+    return cache
+
+
+def llm_cache_stats() -> Optional[Dict[str, Any]]:
+    cache = get_llm_cache()
+    return cache.stats() if isinstance(cache, SQLiteLLMCache) else None
+
+
+if __name__ == "__main__":
+    print("importing llm cache from llm_cache.py")
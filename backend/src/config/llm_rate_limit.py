@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import get_llm_cache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import BaseMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableBinding, RunnableLambda
+
+from config.settings import get_settings
+
+try:
+    from langchain_core.language_models._utils import _normalize_messages
+except ImportError:  # older langchain-core hands messages to the cache unchanged
+    def _normalize_messages(messages):
+        return list(messages)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # optional: fall back to a chars/token heuristic
+    _ENCODING = None
+
+CHARS_PER_TOKEN = 4
+
+PROVIDER_GOOGLE = "google"
+PROVIDER_ANTHROPIC = "anthropic"
+
+
+class TokenBucket:
+    """
+    Refills continuously at capacity/period. acquire(n) waits (FIFO) until n
+    units are available; requests larger than the bucket are clamped to its
+    capacity so they still get through, just at the full-bucket price.
+    """
+
+    def __init__(self, capacity: float, period_s: float = 60.0):
+        self.capacity = float(capacity)
+        self.refill_per_s = self.capacity / period_s
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.refill_per_s)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Returns seconds spent waiting."""
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._level >= amount:
+                    self._level -= amount
+                    return waited
+                delay = (amount - self._level) / self.refill_per_s
+                waited += delay
+                await asyncio.sleep(delay)
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._level
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets for one LLM provider."""
+
+    def __init__(self, name: str, rpm: int, tpm: int):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self.calls = 0
+        self.tokens = 0
+        self.waited_s = 0.0
+        self.cached_calls = 0   # answered by the LLM cache, never charged
+
+    async def acquire(self, tokens: int = 0, requests: int = 1) -> None:
+        waited = 0.0
+        for _ in range(requests):
+            waited += await self._requests.acquire(1)
+        if tokens:
+            waited += await self._tokens.acquire(tokens)
+        self.calls += requests
+        self.tokens += tokens
+        self.waited_s += waited
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "calls": self.calls,
+            "tokens": self.tokens,
+            "waited_s": round(self.waited_s, 2),
+            "cached_calls": self.cached_calls,
+            "requests_available": int(self._requests.available),
+            "tokens_available": int(self._tokens.available),
+        }
+
+
+_LIMITERS: Dict[str, ProviderRateLimiter] = {}
+
+
+def get_provider_limiter(provider: str) -> ProviderRateLimiter:
+    """Process-wide limiter for `provider`, built from settings on first use."""
+    limiter = _LIMITERS.get(provider)
+    if limiter is None:
+        settings = get_settings()
+        if provider == PROVIDER_GOOGLE:
+            limiter = ProviderRateLimiter(provider, settings.llm_google_rpm, settings.llm_google_tpm)
+        elif provider == PROVIDER_ANTHROPIC:
+            limiter = ProviderRateLimiter(provider, settings.llm_anthropic_rpm, settings.llm_anthropic_tpm)
+        else:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        _LIMITERS[provider] = limiter
+    return limiter
+
+
+def set_provider_limits(provider: str, rpm: int, tpm: int) -> ProviderRateLimiter:
+    """Replace `provider`'s limiter (e.g. lift the quotas for offline benchmarks)."""
+    limiter = ProviderRateLimiter(provider, rpm, tpm)
+    _LIMITERS[provider] = limiter
+    return limiter
+
+
+def estimate_prompt_tokens(value: Any) -> int:
+    """
+    Input-token estimate for whatever a chat model is about to receive (string,
+    PromptValue, message list, or a dict of those). Uses tiktoken when
+    installed; Gemini/Claude tokenizers differ, but it is close enough to pace
+    a per-minute budget.
+    """
+    if isinstance(value, PromptValue):
+        text = value.to_string()
+    elif isinstance(value, BaseMessage):
+        text = value.content if isinstance(value.content, str) else str(value.content)
+    elif isinstance(value, (list, tuple)):
+        return sum(estimate_prompt_tokens(v) for v in value)
+    elif isinstance(value, dict):
+        return sum(estimate_prompt_tokens(v) for v in value.values())
+    else:
+        text = value if isinstance(value, str) else str(value)
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+async def is_cached(model: Runnable, value: Any) -> bool:
+    """
+    True when `model` will answer `value` from its LLM cache (see
+    src.config.llm_cache). The key is built the way BaseChatModel builds its
+    own lookup: the normalized messages plus the llm_string of the bound
+    kwargs (tools, stop). Anything unrecognised counts as a miss.
+    """
+    kwargs: Dict[str, Any] = {}
+    if isinstance(model, RunnableBinding):
+        model, kwargs = model.bound, dict(model.kwargs)
+    if not isinstance(model, BaseChatModel) or model.cache is False:
+        return False
+    cache = model.cache if isinstance(model.cache, BaseCache) else get_llm_cache()
+    if cache is None:
+        return False
+    # Popped by BaseChatModel.agenerate before the lookup
+    kwargs.pop("ls_structured_output_format", None)
+    kwargs.pop("structured_output_format", None)
+    stop = kwargs.pop("stop", None)
+    try:
+        prompt = dumps(_normalize_messages(model._convert_input(value).to_messages()))
+        llm_string = model._get_llm_string(stop=stop, **kwargs)
+        # SQLiteLLMCache checks without touching its hit/miss counters
+        acontains = getattr(cache, "acontains", None)
+        if acontains is not None:
+            return await acontains(prompt, llm_string)
+        return isinstance(await cache.alookup(prompt, llm_string), list)
+    except Exception:
+        return False
+
+
+def rate_limited(model: Runnable, provider: str) -> Runnable:
+    """
+    `model` preceded by an acquire step on the shared provider limiter:
+    `prompt | rate_limited(llm, PROVIDER_GOOGLE) | parser`. Apply it after
+    bind_tools / with_structured_output. The step waits for one request and the
+    prompt's estimated tokens, then passes the input through unchanged; calls
+    the LLM cache will answer are passed through without being charged, so
+    cached re-runs are not throttled. Sync invocations pass straight through
+    (every pipeline here is async).
+    """
+    async def _acquire(value: Any) -> Any:
+        limiter = get_provider_limiter(provider)
+        if await is_cached(model, value):
+            limiter.cached_calls += 1
+        else:
+            await limiter.acquire(tokens=estimate_prompt_tokens(value))
+        return value
+
+    return RunnableLambda(lambda value: value, afunc=_acquire, name=f"rate_limit_{provider}") | model
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.stats() for name, limiter in _LIMITERS.items()}
+
+
+if __name__ == "__main__":
+    print("importing llm rate limiters from llm_rate_limit.py")
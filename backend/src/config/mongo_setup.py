@@ -7,7 +7,7 @@ from pydantic import BaseModel
 from beanie import init_beanie  
 from config.settings import get_settings
 from src.mongo_schema_overwrite import (  
-     Business, Person, Product, Compound, MedicalTreatment, Resource, Transcript, Claim, Episode, BioHack, BioMarker, Protocol, Treatment, CaseStudy, BaseDoc, TimeStamped, SuccessStory, Channel, AttributionQuote)
+     Business, Person, Product, Compound, MedicalTreatment, Resource, Transcript, Claim, Episode, BioHack, BioMarker, Protocol, Treatment, CaseStudy, BaseDoc, TimeStamped, SuccessStory, Channel, AttributionQuote, FailedEpisode, EpisodePageParse, TranscriptBody, EntityResolutionEntry)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -81,7 +81,10 @@ async def init_beanie_with_pymongo() -> AsyncMongoClient:
     client = await get_async_mongo_client()
     if client is None:
         raise RuntimeError("Async Mongo client not available. Check MONGO_CONNECTION.")
-    
+    return await init_beanie_with_client(client)
+
+async def init_beanie_with_client(client: AsyncMongoClient) -> AsyncMongoClient:
+    """Initialize Beanie on an existing async client (e.g. one passed into a pipeline)"""
     # Initialize Beanie with all document models
     db_name = settings.mongo_db_name or "biohack_agent"
     await init_beanie(
@@ -94,6 +97,7 @@ async def init_beanie_with_pymongo() -> AsyncMongoClient:
             MedicalTreatment,
             Resource,
             Transcript,
+            TranscriptBody,
             Claim,
             Episode,  
             BioHack, 
@@ -104,6 +108,9 @@ async def init_beanie_with_pymongo() -> AsyncMongoClient:
             SuccessStory,
             Channel,
             AttributionQuote,
+            FailedEpisode,
+            EpisodePageParse,
+            EntityResolutionEntry,
         ]
     )
     return client
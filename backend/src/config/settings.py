@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Literal, Optional
 
 from pydantic import AliasChoices, Field, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -113,6 +113,103 @@ class AppSettings(BaseSettings):
         description="Port for running the FastAPI server.",
     )
 
+    # --- In-process background jobs ---
+    job_runner_max_workers: int = Field(
+        default=2,
+        ge=1,
+        validation_alias=AliasChoices("JOB_RUNNER_MAX_WORKERS", "job_runner_max_workers"),
+        description="Max background jobs running at once inside the API process.",
+    )
+
+    # --- LLM response cache ---
+    llm_cache_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("LLM_CACHE_ENABLED", "llm_cache_enabled"),
+        description="Serve repeated prompt+model+params LLM calls from the on-disk cache.",
+    )
+    llm_cache_path: Path = Field(
+        default=BACKEND_DIR / ".llm_cache.sqlite",
+        validation_alias=AliasChoices("LLM_CACHE_PATH", "llm_cache_path"),
+        description="SQLite file backing the LLM response cache.",
+    )
+
+    # --- Ingestion graph checkpoints (resume a failed run from its last node) ---
+    ingestion_checkpoints_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("INGESTION_CHECKPOINTS_ENABLED", "ingestion_checkpoints_enabled"),
+        description="Checkpoint every ingestion graph node so failed runs resume instead of restarting.",
+    )
+    ingestion_checkpoint_path: Path = Field(
+        default=BACKEND_DIR / ".ingestion_checkpoints.sqlite",
+        validation_alias=AliasChoices("INGESTION_CHECKPOINT_PATH", "ingestion_checkpoint_path"),
+        description="SQLite file backing the ingestion graph checkpointer.",
+    )
+
+    # --- LLM backend ("live" providers, or the offline fake for benchmarks) ---
+    llm_backend: Literal["live", "fake"] = Field(
+        default="live",
+        validation_alias=AliasChoices("LLM_BACKEND", "llm_backend"),
+        description="'fake' swaps every chat model for the deterministic FakeChatModel.",
+    )
+    fake_llm_latency_s: float = Field(
+        default=0.5,
+        ge=0,
+        validation_alias=AliasChoices("FAKE_LLM_LATENCY_S", "fake_llm_latency_s"),
+        description="Seconds each fake LLM call takes.",
+    )
+    fake_llm_jitter_s: float = Field(
+        default=0.0,
+        ge=0,
+        validation_alias=AliasChoices("FAKE_LLM_JITTER_S", "fake_llm_jitter_s"),
+        description="Extra random (seeded by prompt) seconds added to each fake LLM call.",
+    )
+
+    # --- LLM provider quotas (shared by every chain in the process) ---
+    llm_google_rpm: int = Field(
+        default=60,
+        ge=1,
+        validation_alias=AliasChoices("LLM_GOOGLE_RPM", "llm_google_rpm"),
+        description="Gemini requests per minute.",
+    )
+    llm_google_tpm: int = Field(
+        default=1_000_000,
+        ge=1,
+        validation_alias=AliasChoices("LLM_GOOGLE_TPM", "llm_google_tpm"),
+        description="Gemini input tokens per minute.",
+    )
+    llm_anthropic_rpm: int = Field(
+        default=50,
+        ge=1,
+        validation_alias=AliasChoices("LLM_ANTHROPIC_RPM", "llm_anthropic_rpm"),
+        description="Anthropic (Vertex) requests per minute.",
+    )
+    llm_anthropic_tpm: int = Field(
+        default=200_000,
+        ge=1,
+        validation_alias=AliasChoices("LLM_ANTHROPIC_TPM", "llm_anthropic_tpm"),
+        description="Anthropic (Vertex) input tokens per minute.",
+    )
+
+    # --- Web fetching (crawl pacing) ---
+    transcript_backfill_workers: int = Field(
+        default=16,
+        ge=1,
+        validation_alias=AliasChoices("TRANSCRIPT_BACKFILL_WORKERS", "transcript_backfill_workers"),
+        description="Concurrent workers for the transcript-URL backfill.",
+    )
+    web_fetch_host_rate_per_s: float = Field(
+        default=8.0,
+        gt=0,
+        validation_alias=AliasChoices("WEB_FETCH_HOST_RATE_PER_S", "web_fetch_host_rate_per_s"),
+        description="Sustained requests per second allowed against a single host.",
+    )
+    web_fetch_host_burst: int = Field(
+        default=8,
+        ge=1,
+        validation_alias=AliasChoices("WEB_FETCH_HOST_BURST", "web_fetch_host_burst"),
+        description="Requests a host may receive back-to-back before rate limiting kicks in.",
+    )
+
     # --- Web Fetch Headers (defaults) ---
     web_fetch_user_agent: str = Field(
         default=(
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+from typing import Dict, List, Optional
+
+from pymongo import AsyncMongoClient
+
+from src.config.llm_rate_limit import rate_limit_stats
+from src.config.mongo_setup import init_beanie_with_client, init_beanie_with_pymongo
+from config.settings import get_settings
+from src.ingestion.indexing.transcript_ingestion_graph import run_transcript_ingestion, transcript_is_current
+from src.ingestion.utils.transcript_to_document import TranscriptBatchProvider
+from src.jobs.job_runner import JobProgress
+from src.mongo_schema_overwrite import Episode
+
+async def select_episodes(episode_numbers: Optional[List[int]] = None) -> List[Episode]:
+    """Given episode numbers, or every episode with a transcript_url."""
+    query: Dict = {"transcript_url": {"$nin": [None, ""]}}
+    if episode_numbers:
+        query["episode_number"] = {"$in": list(episode_numbers)}
+    return await Episode.find(query).sort("-episode_number").to_list()
+
+
+async def run_batch_ingestion(
+    episode_numbers: Optional[List[int]] = None,
+    *,
+    client: Optional[AsyncMongoClient] = None,
+    concurrency: int = 4,
+    download_concurrency: int = 8,
+    force: bool = False,
+    summarization_mode: str = "auto",
+    summary_strategy: str = "per_section",
+    progress: Optional[JobProgress] = None,
+) -> Dict[str, int]:
+    """
+    Run the ingestion graph over many transcripts.
+
+    Transcripts are downloaded through one TranscriptBatchProvider and each is
+    handed to the graph as soon as a slot is free; up to `concurrency` graphs
+    run at once, and the provider downloads at most `download_concurrency`
+    ahead, so a throttled LLM stage never leaves the whole batch in memory.
+    Every model call inside them waits on the process-wide Gemini /
+    Anthropic RPM and TPM limiters (see src.config.llm_rate_limit), so raising
+    `concurrency` cannot push past provider quotas. Results are persisted per
+    episode by run_transcript_ingestion, and unchanged transcripts are skipped
+    without touching the budgets.
+
+    Pass `client` to reuse an open connection (e.g. the app's); otherwise one
+    is opened and closed here.
+    """
+    own_client = client is None
+    client = await init_beanie_with_pymongo() if own_client else await init_beanie_with_client(client)
+    try:
+        return await _ingest_episodes(
+            client, episode_numbers,
+            concurrency=concurrency,
+            download_concurrency=download_concurrency,
+            force=force,
+            summarization_mode=summarization_mode,
+            summary_strategy=summary_strategy,
+            progress=progress,
+        )
+    finally:
+        if own_client:
+            await client.close()
+
+
+async def _ingest_episodes(
+    client: AsyncMongoClient,
+    episode_numbers: Optional[List[int]],
+    *,
+    concurrency: int,
+    download_concurrency: int,
+    force: bool,
+    summarization_mode: str,
+    summary_strategy: str,
+    progress: Optional[JobProgress],
+) -> Dict[str, int]:
+    episodes = await select_episodes(episode_numbers)
+    by_number = {ep.episode_number: ep for ep in episodes if ep.episode_number is not None}
+    print(f"Batch ingestion: {len(by_number)} episodes (concurrency={concurrency})")
+
+    counts = {"ingested": 0, "skipped": 0, "failed": 0}
+    if progress is not None:
+        progress.set_total(len(by_number))
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _ingest(episode: Episode, text: str) -> None:
+        # Runs in a `sem` slot taken by the caller before the task was created
+        n = episode.episode_number
+        if progress is not None:
+            progress.item_started(n)
+        try:
+            if not force and await transcript_is_current(episode, text):
+                counts["skipped"] += 1
+            else:
+                await run_transcript_ingestion(
+                    episode, text, force=True,
+                    summarization_mode=summarization_mode, summary_strategy=summary_strategy,
+                )
+                counts["ingested"] += 1
+                print(f"✅ Ingested episode {n}")
+            if progress is not None:
+                progress.item_finished(n)
+        except Exception as e:
+            counts["failed"] += 1
+            print(f"❌ Ingestion failed for episode {n}: {e}")
+            if progress is not None:
+                progress.item_finished(n, e)
+        finally:
+            sem.release()
+
+    provider = TranscriptBatchProvider(
+        client,
+        db_name=get_settings().mongo_db_name or "biohack_agent",
+        collection="episodes",
+        concurrency=download_concurrency,
+    )
+    tasks = []
+    try:
+        async for n, text in provider.stream(by_number.keys()):
+            # Wait for a free graph slot before taking the transcript, so downloads
+            # (bounded by the provider) stay only a little ahead of ingestion
+            await sem.acquire()
+            tasks.append(asyncio.create_task(_ingest(by_number[n], text)))
+        await asyncio.gather(*tasks)
+    finally:
+        # Only does anything when the stream or the job itself failed / was cancelled
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    for n, err in provider.errors.items():
+        counts["failed"] += 1
+        if progress is not None:
+            progress.item_started(n)
+            progress.item_finished(n, err)
+
+    print(f"Batch ingestion done: {counts}")
+    print(f"Provider budgets: {rate_limit_stats()}")
+    return counts
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Run the transcript ingestion graph over many episodes")
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--episodes", type=lambda s: [int(x) for x in s.split(",") if x.strip()],
+                        help="Comma-separated episode numbers")
+    target.add_argument("--all", action="store_true", help="Every episode with a transcript_url")
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--download-concurrency", type=int, default=8)
+    p.add_argument("--mode", choices=["auto", "single", "map_reduce"], default="auto")
+    p.add_argument("--summary-strategy", choices=["per_section", "multi_section"], default="per_section",
+                   help="multi_section sends the transcript once for all summaries")
+    p.add_argument("--force", action="store_true", help="Re-ingest even if content and prompts are unchanged")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    asyncio.run(run_batch_ingestion(
+        None if args.all else args.episodes,
+        concurrency=args.concurrency,
+        download_concurrency=args.download_concurrency,
+        force=args.force,
+        summarization_mode=args.mode,
+        summary_strategy=args.summary_strategy,
+    ))
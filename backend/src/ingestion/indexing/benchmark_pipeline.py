@@ -0,0 +1,185 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from src.config.fake_llm import fake_llm_enabled
+from src.config.llm_rate_limit import PROVIDER_ANTHROPIC, PROVIDER_GOOGLE, rate_limit_stats, set_provider_limits
+from src.ingestion.utils.transcript_chunker import chunk_transcript
+
+# Offline benchmark of the ingestion graph's orchestration, run against
+# FakeChatModel (LLM_BACKEND=fake). Nothing is written to MongoDB.
+#
+#   python -m src.ingestion.indexing.benchmark_pipeline --transcripts 40 --concurrency 8 --latency 0.5
+
+_WORDS = (
+    "mitochondria sleep ketones protocol supplement light cold exposure fasting "
+    "recovery inflammation dose study biomarker energy focus collagen peptide"
+).split()
+
+
+def synthetic_transcript(chars: int, seed: int = 0) -> Tuple[str, List[Dict[str, Any]]]:
+    """A timestamped two-speaker transcript of ~`chars` characters plus a matching timeline."""
+    lines: List[str] = []
+    timeline: List[Dict[str, Any]] = []
+    size, i = 0, 0
+    while size < chars:
+        t = 20 * i
+        stamp = f"{t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}"
+        words = " ".join(_WORDS[(seed + i * 7 + k) % len(_WORDS)] for k in range(40))
+        line = f"[{stamp}] Speaker {i % 2 + 1}: {words.capitalize()}."
+        lines.append(line)
+        if i % 30 == 0:
+            timeline.append({"time": stamp, "description": f"Topic {len(timeline) + 1}"})
+        size += len(line) + 1
+        i += 1
+    return "\n".join(lines), timeline
+
+
+def llm_rounds(
+    graph_module,
+    text: str,
+    timeline: List[Dict[str, Any]],
+    mode: str,
+    summary_strategy: str = "per_section",
+) -> int:
+    """Sequential LLM waves one transcript needs; times the fake latency gives the floor."""
+    # Imported late: the prompts module pulls from LangSmith unless LLM_BACKEND=fake is set
+    from src.ingestion.indexing.map_reduce import MAP_CONCURRENCY, use_map_reduce
+
+    rounds = 0
+    if use_map_reduce(text, mode):
+        rounds += math.ceil(len(chunk_transcript(text, timeline)) / MAP_CONCURRENCY)
+    if summary_strategy == "multi_section":
+        rounds += 1
+    else:
+        rounds += math.ceil(len(graph_module.SUMMARY_PROMPTS) / graph_module.SUMMARY_CONCURRENCY)
+    per_provider: Dict[str, int] = {}
+    for key in graph_module.STRUCTURED_EXTRACTOR_PROMPTS:
+        provider = graph_module.STRUCTURED_MODEL_PROVIDERS.get(key, PROVIDER_GOOGLE)
+        per_provider[provider] = per_provider.get(provider, 0) + 1
+    rounds += max(
+        (math.ceil(n / graph_module.PROVIDER_CONCURRENCY[p]) for p, n in per_provider.items()),
+        default=0,
+    )
+    return rounds
+
+
+async def run_benchmark(
+    *,
+    transcripts: int = 20,
+    concurrency: int = 4,
+    chars: int = 60000,
+    mode: str = "auto",
+    summary_strategy: str = "per_section",
+    transcript_file: Optional[str] = None,
+    throttle: bool = False,
+) -> Dict[str, Any]:
+    """
+    Push `transcripts` transcripts through the compiled ingestion graph, up to
+    `concurrency` at once, and report throughput plus where the time goes:
+    the LLM floor (sequential fake-latency waves) and the rest (orchestration).
+    """
+    if not fake_llm_enabled():
+        raise RuntimeError("run_benchmark needs LLM_BACKEND=fake; it would otherwise call the live providers")
+
+    # Imported late: the graph builds its models from settings at import time
+    from src.ingestion.indexing import transcript_ingestion_graph as g
+
+    if not throttle:
+        for provider in (PROVIDER_GOOGLE, PROVIDER_ANTHROPIC):
+            set_provider_limits(provider, rpm=10**9, tpm=10**12)
+
+    if transcript_file:
+        with open(transcript_file, "r", encoding="utf-8") as f:
+            inputs = [(f.read(), [])] * transcripts
+    else:
+        inputs = [synthetic_transcript(chars, seed=n) for n in range(transcripts)]
+
+    sem = asyncio.Semaphore(concurrency)
+    durations: List[float] = []
+    # What persist_extracted_entities would write, per entity type
+    extracted: Dict[str, int] = {}
+
+    async def _one(text: str, timeline: List[Dict[str, Any]]) -> None:
+        async with sem:
+            started = time.perf_counter()
+            final_state = await g.app.ainvoke({
+                **g.initial_state,
+                "aggregate_summary": "",
+                "structured_tool_call_dict": {},
+                "full_transcript": Document(page_content=text),
+                "summarization_mode": mode,
+                "summary_strategy": summary_strategy,
+                "timeline": timeline,
+            })
+            durations.append(time.perf_counter() - started)
+            for key, entities in (final_state.get("structured_tool_call_dict") or {}).items():
+                extracted[key] = extracted.get(key, 0) + len(entities or [])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_one(text, timeline) for text, timeline in inputs))
+    wall_s = time.perf_counter() - started
+
+    latency_s = g.llm.latency_s
+    floor_s = statistics.mean(
+        llm_rounds(g, text, timeline, mode, summary_strategy) * latency_s for text, timeline in inputs
+    )
+    mean_s = statistics.mean(durations)
+
+    report = {
+        "transcripts": transcripts,
+        "concurrency": concurrency,
+        "mode": mode,
+        "summary_strategy": summary_strategy,
+        "transcript_chars": int(statistics.mean(len(text) for text, _ in inputs)),
+        "fake_latency_s": latency_s,
+        "wall_s": round(wall_s, 3),
+        "transcripts_per_min": round(transcripts / wall_s * 60, 2),
+        "per_transcript_mean_s": round(mean_s, 3),
+        "per_transcript_p95_s": round(sorted(durations)[int(0.95 * (len(durations) - 1))], 3),
+        "llm_floor_s": round(floor_s, 3),
+        "orchestration_overhead_ms": round((mean_s - floor_s) * 1000, 2),
+        "extracted_entities": extracted,
+        "llm_calls": {p: s["calls"] for p, s in rate_limit_stats().items()},
+        "llm_input_tokens": {p: s["tokens"] for p, s in rate_limit_stats().items()},
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark the ingestion graph against the fake LLM backend")
+    p.add_argument("--transcripts", type=int, default=20)
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--chars", type=int, default=60000, help="Size of each synthetic transcript")
+    p.add_argument("--transcript-file", help="Use this transcript (repeated) instead of synthetic ones")
+    p.add_argument("--mode", choices=["auto", "single", "map_reduce"], default="auto")
+    p.add_argument("--summary-strategy", choices=["per_section", "multi_section"], default="per_section")
+    p.add_argument("--latency", type=float, default=0.5, help="Seconds per fake LLM call")
+    p.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds per fake LLM call")
+    p.add_argument("--throttle", action="store_true", help="Keep the configured provider RPM/TPM limits")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    # Must be set before settings are first read
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_S"] = str(args.latency)
+    os.environ["FAKE_LLM_JITTER_S"] = str(args.jitter)
+    asyncio.run(run_benchmark(
+        transcripts=args.transcripts,
+        concurrency=args.concurrency,
+        chars=args.chars,
+        mode=args.mode,
+        summary_strategy=args.summary_strategy,
+        transcript_file=args.transcript_file,
+        throttle=args.throttle,
+    ))
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import get_settings
+
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:  # optional: graphs then run without checkpoints
+    aiosqlite = None
+    AsyncSqliteSaver = None
+
+# One saver per event loop (aiosqlite connections are bound to the loop that opened them)
+_SAVER: Optional[Tuple[asyncio.AbstractEventLoop, Any]] = None
+_SAVER_LOCK: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
+
+
+def _lock() -> asyncio.Lock:
+    global _SAVER_LOCK
+    loop = asyncio.get_running_loop()
+    if _SAVER_LOCK is None or _SAVER_LOCK[0] is not loop:
+        _SAVER_LOCK = (loop, asyncio.Lock())
+    return _SAVER_LOCK[1]
+
+
+async def get_checkpointer() -> Optional[Any]:
+    """
+    Process-wide SQLite checkpointer for the ingestion graph, or None when
+    disabled (INGESTION_CHECKPOINTS_ENABLED=false) or langgraph-checkpoint-sqlite
+    is not installed.
+    """
+    global _SAVER
+    settings = get_settings()
+    if not settings.ingestion_checkpoints_enabled or AsyncSqliteSaver is None:
+        return None
+    loop = asyncio.get_running_loop()
+    async with _lock():
+        if _SAVER is None or _SAVER[0] is not loop:
+            path = settings.ingestion_checkpoint_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = await aiosqlite.connect(str(path))
+            saver = AsyncSqliteSaver(conn)
+            await saver.setup()
+            _SAVER = (loop, saver)
+    return _SAVER[1]
+
+
+def thread_config(thread_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def clear_thread(saver: Optional[Any], thread_id: str) -> None:
+    """Drop every checkpoint of `thread_id`; never raises."""
+    if saver is None:
+        return
+    try:
+        await saver.adelete_thread(thread_id)
+    except Exception as e:
+        print(f"Failed to clear checkpoints for thread {thread_id}: {e}")
+
+
+if __name__ == "__main__":
+    print("Importing checkpointing.py")
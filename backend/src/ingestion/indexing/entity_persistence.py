@@ -0,0 +1,251 @@
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from enum import Enum
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+from bson import DBRef, ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.mongo_schema_overwrite import BaseDoc, Business, Claim, Compound, Episode, Product, Transcript, Treatment
+from src.ingestion.utils.entity_names import normalize_entity_name
+from src.ingestion.indexing.entity_resolution import EntityResolutionIndex, get_resolution_index
+
+
+@dataclass(frozen=True)
+class EntitySpec:
+    document: Type[BaseDoc]
+    name_field: str               # field of the extracted entity that names it
+    key_field: str                # normalized dedup key stored on the document
+    mentions_field: str           # EpisodeMentions list the entities are linked into
+    per_transcript: bool = False  # dedup within one transcript only (claims)
+    resolve: bool = False         # fuzzy-match names against existing entities first
+
+
+# structured_tool_call_dict key -> how its entities are stored
+ENTITY_SPECS: Dict[str, EntitySpec] = {
+    "product_information": EntitySpec(Product, "name", "normalized_name", "products", resolve=True),
+    "medical_treatment": EntitySpec(Treatment, "name", "normalized_name", "treatments"),
+    "claims_made": EntitySpec(Claim, "text", "normalized_text", "claims", per_transcript=True),
+    "businesses_entities": EntitySpec(Business, "canonical_name", "normalized_name", "businesses", resolve=True),
+    "compounds": EntitySpec(Compound, "name", "normalized_name", "compounds", resolve=True),
+}
+
+# Never written from an extraction
+_SKIP_FIELDS = {"id", "revision_id", "created_at", "updated_at"}
+
+
+def _entity_name(spec: EntitySpec, entity: Dict[str, Any]) -> Optional[str]:
+    name = entity.get(spec.name_field)
+    if not name and spec.document is Business:
+        name = next(iter(entity.get("aliases") or []), None)
+    return name
+
+
+def _merge(into: Dict[str, Any], other: Dict[str, Any]) -> None:
+    """Lists are unioned (order kept), other fields keep the first non-empty value."""
+    for field, value in other.items():
+        current = into.get(field)
+        if isinstance(current, list) and isinstance(value, list):
+            into[field] = current + [v for v in value if v not in current]
+        elif current in (None, "", []):
+            into[field] = value
+
+
+def _bson_ready(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, list):
+        return [_bson_ready(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _bson_ready(v) for k, v in value.items()}
+    return value
+
+
+def group_entities(spec: EntitySpec, entities: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Extracted entities keyed by normalized name, duplicates merged; nameless ones dropped."""
+    groups: Dict[str, Dict[str, Any]] = {}
+    for entity in entities:
+        name = _entity_name(spec, entity)
+        key = normalize_entity_name(name)
+        if not key:
+            continue
+        fields = {k: v for k, v in entity.items() if v is not None}
+        fields[spec.name_field] = name
+        if key in groups:
+            _merge(groups[key], fields)
+        else:
+            groups[key] = fields
+    return groups
+
+
+def resolve_groups(
+    spec: EntitySpec,
+    index: EntityResolutionIndex,
+    groups: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]], Dict[str, Set[str]]]:
+    """
+    Split grouped entities into ones the index resolves to an existing
+    document (keyed by its id) and new ones (keyed by normalized name), with
+    near-duplicates inside the batch folded together. Also returns the
+    normalized variants behind each key. Business spellings that were folded
+    away are kept as aliases.
+    """
+    existing: Dict[str, Dict[str, Any]] = {}
+    new: Dict[str, Dict[str, Any]] = {}
+    variants: Dict[str, Set[str]] = {}
+    batch = EntityResolutionIndex(index.entity_type)
+    keep_aliases = "aliases" in spec.document.model_fields
+
+    for key, fields in groups.items():
+        target, bucket = index.resolve(key), existing
+        if target is None:
+            target, bucket = batch.resolve(key) or key, new
+            batch.add(target, key)
+        if keep_aliases and (bucket is existing or target != key):
+            fields = {**fields, "aliases": [*(fields.get("aliases") or []), fields[spec.name_field]]}
+        if target in bucket:
+            _merge(bucket[target], fields)
+        else:
+            bucket[target] = fields
+        variants.setdefault(target, set()).add(key)
+    return existing, new, variants
+
+
+def _validated(spec: EntitySpec, key: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Fields validated against the Beanie document (defaults, enum coercion), ready for BSON."""
+    try:
+        doc = spec.document.model_validate({**fields, spec.key_field: key})
+    except Exception as e:
+        print(f"Skipping invalid {spec.document.__name__} '{key}': {e}")
+        return None
+    return _bson_ready(doc.model_dump(exclude=_SKIP_FIELDS))
+
+
+def _update_existing(spec: EntitySpec, entity_id: str, fields: Dict[str, Any], now: datetime) -> Optional[UpdateOne]:
+    """A resolved entity only gains list values; its scalars and key stay as first stored."""
+    dumped = _validated(spec, normalize_entity_name(fields.get(spec.name_field)), fields)
+    if dumped is None:
+        return None
+    update: Dict[str, Any] = {"$set": {"updated_at": now}}
+    add_to_set = {field: {"$each": value} for field, value in dumped.items() if isinstance(value, list) and value}
+    if add_to_set:
+        update["$addToSet"] = add_to_set
+    return UpdateOne({"_id": ObjectId(entity_id)}, update)
+
+
+def _upsert(
+    spec: EntitySpec,
+    key: str,
+    fields: Dict[str, Any],
+    now: datetime,
+    transcript_ref: Optional[DBRef],
+) -> Optional[UpdateOne]:
+    """
+    Insert-once scalars ($setOnInsert), list fields merged across episodes
+    ($addToSet), updated_at always bumped.
+    """
+    dumped = _validated(spec, key, fields)
+    if dumped is None:
+        return None
+
+    set_on_insert = {"created_at": now}
+    add_to_set = {}
+    for field, value in dumped.items():
+        if isinstance(value, list):
+            add_to_set[field] = {"$each": value}
+        else:
+            set_on_insert[field] = value
+
+    # Equality fields of the query are written on insert; keep them out of the operators
+    query: Dict[str, Any] = {spec.key_field: key}
+    if spec.per_transcript:
+        query["transcript"] = transcript_ref
+    for field in query:
+        set_on_insert.pop(field, None)
+
+    update: Dict[str, Any] = {"$setOnInsert": set_on_insert, "$set": {"updated_at": now}}
+    if add_to_set:
+        update["$addToSet"] = add_to_set
+    return UpdateOne(query, update, upsert=True)
+
+
+async def persist_entities(
+    structured: Dict[str, List[Dict[str, Any]]],
+    *,
+    episode_id: str,
+    transcript_id: str,
+) -> Dict[str, List[str]]:
+    """
+    Upsert one transcript's extracted entities and link them to the episode.
+
+    Per entity type: duplicates are merged by normalized name, written with a
+    single unordered bulk upsert keyed on that name (so an entity seen in many
+    episodes stays one document), and their ids are read back with one $in
+    query. Products, businesses and compounds first go through the fuzzy
+    resolution index, so "BP coffee" updates the existing "Bulletproof Coffee"
+    document instead of creating a new one; new names and variants are then
+    added to the index. The episode gets every id $addToSet into `mentions` in
+    one update. Safe to re-run: nothing is duplicated. Returns ids per type.
+    """
+    now = datetime.now(UTC)
+    transcript_ref = DBRef(Transcript.get_pymongo_collection().name, ObjectId(transcript_id))
+    persisted: Dict[str, List[str]] = {}
+    mention_refs: Dict[str, List[DBRef]] = {}
+
+    for key, spec in ENTITY_SPECS.items():
+        groups = group_entities(spec, structured.get(key) or [])
+        index = await get_resolution_index(spec.mentions_field) if spec.resolve and groups else None
+        existing: Dict[str, Dict[str, Any]] = {}
+        variants: Dict[str, Set[str]] = {}
+        if index is not None:
+            existing, groups, variants = resolve_groups(spec, index, groups)
+
+        ops = [op for name, fields in groups.items() if (op := _upsert(spec, name, fields, now, transcript_ref))]
+        ops += [op for entity_id, fields in existing.items() if (op := _update_existing(spec, entity_id, fields, now))]
+        if not ops:
+            continue
+        collection = spec.document.get_pymongo_collection()
+        try:
+            await collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # A concurrent episode inserted the same name first; its document is reused below
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+        query: Dict[str, Any] = {spec.key_field: {"$in": list(groups)}}
+        if spec.per_transcript:
+            query["transcript"] = transcript_ref
+        if existing:
+            query = {"$or": [query, {"_id": {"$in": [ObjectId(i) for i in existing]}}]}
+        docs = [doc async for doc in collection.find(query, {"_id": 1, spec.key_field: 1})]
+        ids = [doc["_id"] for doc in docs]
+
+        if index is not None:
+            for doc in docs:
+                entity_id = str(doc["_id"])
+                index.add(entity_id, *variants.get(entity_id if entity_id in existing else doc.get(spec.key_field), ()))
+            await index.save()
+        persisted[key] = [str(i) for i in ids]
+        mention_refs[spec.mentions_field] = [DBRef(collection.name, i) for i in ids]
+
+    if mention_refs:
+        episodes = Episode.get_pymongo_collection()
+        episode_oid = ObjectId(episode_id)
+        # $addToSet cannot descend into a null `mentions`
+        await episodes.update_one({"_id": episode_oid, "mentions": None}, {"$set": {"mentions": {}}})
+        await episodes.update_one(
+            {"_id": episode_oid},
+            {
+                "$addToSet": {f"mentions.{field}": {"$each": refs} for field, refs in mention_refs.items()},
+                "$set": {"updated_at": now},
+            },
+        )
+
+    counts = {k: len(v) for k, v in persisted.items()}
+    print(f"Persisted entities for episode {episode_id}: {counts}")
+    return persisted
+
+
+if __name__ == "__main__":
+    print("Importing entity_persistence.py")
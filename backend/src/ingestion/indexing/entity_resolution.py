@@ -0,0 +1,286 @@
+import asyncio
+import random
+import re
+import zlib
+from collections import defaultdict
+from datetime import datetime, UTC
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from src.mongo_schema_overwrite import Business, Compound, EntityResolutionEntry, Product
+from src.ingestion.utils.entity_names import normalize_entity_name
+
+NGRAM_SIZE = 3
+NUM_PERM = 64
+BANDS = 16            # 16 bands x 4 rows: ~99% recall at Jaccard 0.7, ~2% at 0.3
+MATCH_THRESHOLD = 0.7  # n-gram Jaccard needed to treat two names as one entity
+MIN_ACRONYM_LEN = 3   # whole-name acronyms shorter than this are too ambiguous ("bc")
+MIN_EXPANSION = 3     # a spelled-out token is at least this much longer than its abbreviation
+LETTERS_PER_EDIT = 8  # one-word names may differ by one edit per this many letters (at least one)
+
+_DIGITS_RE = re.compile(r"\d+")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)  # fixed: stored signatures must stay comparable
+_PERMUTATIONS: List[Tuple[int, int]] = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+
+# Entity types that go through resolution, and where their names live
+RESOLVED_TYPES: Dict[str, Tuple[Any, str]] = {
+    "products": (Product, "name"),
+    "businesses": (Business, "canonical_name"),
+    "compounds": (Compound, "name"),
+}
+
+
+@lru_cache(maxsize=65536)
+def ngrams(key: str) -> FrozenSet[str]:
+    padded = f" {key} "
+    if len(padded) <= NGRAM_SIZE:
+        return frozenset([padded])
+    return frozenset(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+
+
+@lru_cache(maxsize=65536)
+def minhash(key: str) -> Tuple[int, ...]:
+    hashes = [zlib.crc32(g.encode("utf-8")) for g in ngrams(key)]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS)
+
+
+def band_keys(signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+    rows = len(signature) // BANDS
+    return [(b, signature[b * rows:(b + 1) * rows]) for b in range(BANDS)]
+
+
+@lru_cache(maxsize=65536)
+def acronym(key: str) -> str:
+    """Token initials: "bulletproof coffee" -> "bc"."""
+    return "".join(token[0] for token in key.split())
+
+
+@lru_cache(maxsize=65536)
+def digit_runs(key: str) -> Tuple[str, ...]:
+    """Numbers in a name: "vitamin b12" -> ("12",). Names whose numbers differ are distinct."""
+    return tuple(_DIGITS_RE.findall(key))
+
+
+def jaccard(a: str, b: str) -> float:
+    x, y = ngrams(a), ngrams(b)
+    return len(x & y) / len(x | y) if x and y else 0.0
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance with adjacent transpositions counted as one edit."""
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+def close_spelling(a: str, b: str) -> bool:
+    """
+    Whether two one-word names are near enough to be a misspelling: trigrams
+    alone put "creatine" / "creatinine" at 0.8, but that is two edits in ten
+    letters, and they are different compounds.
+    """
+    return edit_distance(a, b) <= max(1, max(len(a), len(b)) // LETTERS_PER_EDIT)
+
+
+def _is_abbreviation(short: str, long: str) -> bool:
+    """
+    "bp" abbreviates "bulletproof": both alphabetic, same first letter, the
+    short token's letters appear in order and the long one is a real word
+    (MIN_EXPANSION+ letters longer), so "d" does not abbreviate "d3".
+    """
+    if (
+        len(short) > 4
+        or len(long) < len(short) + MIN_EXPANSION
+        or not short.isalpha()
+        or not long.isalpha()
+        or short[0] != long[0]
+    ):
+        return False
+    it = iter(long)
+    return all(ch in it for ch in short)
+
+
+def abbreviation_match(a: str, b: str) -> bool:
+    """
+    True when one name abbreviates the other: token by token ("bp coffee" ~
+    "bulletproof coffee", at least one token spelled out in both) or as a
+    whole-name acronym of 3+ letters ("nmn" ~ "nicotinamide mono nucleotide").
+    """
+    if digit_runs(a) != digit_runs(b):
+        return False
+    ta, tb = a.split(), b.split()
+    if len(ta) == len(tb) and len(ta) > 1:
+        pairs = list(zip(ta, tb))
+        return any(x == y for x, y in pairs) and all(
+            x == y or _is_abbreviation(x, y) or _is_abbreviation(y, x) for x, y in pairs
+        )
+    for one, other in ((a, b), (b, a)):
+        if " " not in one and len(one) >= MIN_ACRONYM_LEN and one == acronym(other):
+            return True
+    return False
+
+
+class EntityResolutionIndex:
+    """
+    Maps name variants of one entity type to canonical entity ids.
+
+    Exact normalized names (also ignoring spaces) resolve with a dict lookup.
+    Otherwise candidates come from MinHash LSH buckets over character trigrams
+    (near-spellings) and from an acronym bucket ("bp coffee", "nmn"), and are
+    confirmed by exact trigram Jaccard or an abbreviation check, so only a
+    handful of names are ever compared instead of the whole catalog. Names
+    with different numbers never match, and one-word names also need a close
+    spelling.
+    """
+
+    def __init__(self, entity_type: str):
+        self.entity_type = entity_type
+        self._ids: Dict[str, str] = {}
+        self._compact: Dict[str, str] = {}  # spaces removed: "vitamin d 3" finds "vitamin d3"
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = defaultdict(set)
+        self._acronyms: Dict[str, Set[str]] = defaultdict(set)
+        # Added since the last save
+        self._pending: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _insert(self, key: str, entity_id: str, signature: Optional[Iterable[int]] = None) -> None:
+        self._ids[key] = entity_id
+        self._compact.setdefault(key.replace(" ", ""), key)
+        for band in band_keys(tuple(signature) if signature is not None else minhash(key)):
+            self._buckets[band].add(key)
+        for bucket in self._acronym_buckets(key):
+            self._acronyms[bucket].add(key)
+
+    @staticmethod
+    def _acronym_buckets(key: str) -> List[str]:
+        # Multi-token names by their initials; a single token may itself be the
+        # acronym of a longer name. One-letter buckets would hold half the catalog.
+        bucket = key if " " not in key else acronym(key)
+        return [bucket] if len(bucket) >= 2 else []
+
+    def add(self, entity_id: str, *names: Optional[str]) -> None:
+        for name in names:
+            key = normalize_entity_name(name)
+            if key and self._ids.get(key) != entity_id:
+                self._insert(key, entity_id)
+                self._pending[key] = entity_id
+
+    def candidates(self, key: str) -> Set[str]:
+        found: Set[str] = set()
+        for band in band_keys(minhash(key)):
+            found |= self._buckets.get(band, set())
+        for bucket in self._acronym_buckets(key):
+            found |= self._acronyms.get(bucket, set())
+        found.discard(key)
+        return found
+
+    def resolve(self, name: Optional[str]) -> Optional[str]:
+        """Canonical id for `name`, or None when it looks like a new entity."""
+        key = normalize_entity_name(name)
+        if not key:
+            return None
+        hit = self._ids.get(key) or self._ids.get(self._compact.get(key.replace(" ", ""), ""))
+        if hit is not None:
+            return hit
+        best: Optional[Tuple[float, str]] = None
+        for other in self.candidates(key):
+            if digit_runs(other) != digit_runs(key):
+                # "vitamin b" / "vitamin b12", "vitamin k" / "vitamin k2"
+                continue
+            score = jaccard(key, other)
+            if score >= MATCH_THRESHOLD and " " not in key + other and not close_spelling(key, other):
+                # "creatine" / "creatinine" (Jaccard 0.8, two edits in ten letters)
+                continue
+            if score < MATCH_THRESHOLD and abbreviation_match(key, other):
+                score = MATCH_THRESHOLD
+            if score >= MATCH_THRESHOLD and (best is None or (score, other) > best):
+                best = (score, other)
+        return self._ids[best[1]] if best else None
+
+    def load_entries(self, entries: Iterable[EntityResolutionEntry]) -> None:
+        for entry in entries:
+            self._insert(entry.normalized_name, entry.entity_id, entry.signature or None)
+
+    async def save(self) -> int:
+        """Persist names added since the last save in one bulk upsert; returns how many."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        now = datetime.now(UTC)
+        ops = [
+            UpdateOne(
+                {"entity_type": self.entity_type, "normalized_name": key},
+                {
+                    "$set": {"entity_id": entity_id, "signature": list(minhash(key)), "updated_at": now},
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
+            )
+            for key, entity_id in pending.items()
+        ]
+        try:
+            await EntityResolutionEntry.get_pymongo_collection().bulk_write(ops, ordered=False)
+        except Exception as e:
+            self._pending.update(pending)
+            print(f"[entity_resolution] Could not save {len(ops)} {self.entity_type} names: {e}")
+            return 0
+        return len(ops)
+
+
+async def build_resolution_index(entity_type: str) -> EntityResolutionIndex:
+    """
+    Load the persisted index for `entity_type`; when nothing is stored yet,
+    seed it from the catalog (names, and business aliases) and save it.
+    """
+    index = EntityResolutionIndex(entity_type)
+    entries = await EntityResolutionEntry.find({"entity_type": entity_type}).to_list()
+    if entries:
+        index.load_entries(entries)
+        return index
+
+    document, name_field = RESOLVED_TYPES[entity_type]
+    projection = {"_id": 1, name_field: 1, "aliases": 1}
+    async for doc in document.get_pymongo_collection().find({}, projection):
+        index.add(str(doc["_id"]), doc.get(name_field), *(doc.get("aliases") or []))
+    saved = await index.save()
+    print(f"[entity_resolution] Seeded {entity_type} index with {saved} names")
+    return index
+
+
+_INDEXES: Dict[str, EntityResolutionIndex] = {}
+_INDEX_LOCK: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
+
+
+async def get_resolution_index(entity_type: str) -> EntityResolutionIndex:
+    """Process-wide index for `entity_type`, loaded once and shared by concurrent ingestions."""
+    global _INDEX_LOCK
+    index = _INDEXES.get(entity_type)
+    if index is not None:
+        return index
+    loop = asyncio.get_running_loop()
+    if _INDEX_LOCK is None or _INDEX_LOCK[0] is not loop:
+        _INDEX_LOCK = (loop, asyncio.Lock())
+    async with _INDEX_LOCK[1]:
+        if entity_type not in _INDEXES:
+            _INDEXES[entity_type] = await build_resolution_index(entity_type)
+    return _INDEXES[entity_type]
+
+
+if __name__ == "__main__":
+    print("Importing entity_resolution.py")
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable
+
+from src.ingestion.indexing.prompts.transcript_prompts import (
+    CHUNK_NOTES_PROMPT_TEMPLATE,
+    MAP_REDUCE_NOTES_HEADER,
+)
+from src.ingestion.utils.transcript_chunker import (
+    DEFAULT_CHUNK_TOKENS,
+    TranscriptChunk,
+    chunk_transcript,
+    estimate_tokens,
+    format_timeline_entry,
+)
+
+# Above this many (estimated) tokens, "auto" mode summarizes via map-reduce
+MAP_REDUCE_TOKEN_THRESHOLD = 30000
+MAP_CONCURRENCY = 8
+
+SummarizationMode = str  # "single" | "map_reduce" | "auto"
+
+
+def use_map_reduce(text: str, mode: SummarizationMode = "auto") -> bool:
+    if mode == "map_reduce":
+        return True
+    if mode == "single":
+        return False
+    return estimate_tokens(text) > MAP_REDUCE_TOKEN_THRESHOLD
+
+
+async def map_chunk_notes(
+    llm: Runnable,
+    chunks: Sequence[TranscriptChunk],
+    *,
+    concurrency: int = MAP_CONCURRENCY,
+) -> List[str]:
+    """Map step: notes for every chunk, in parallel, returned in chunk order."""
+    chain = CHUNK_NOTES_PROMPT_TEMPLATE | llm | StrOutputParser()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(chunk: TranscriptChunk) -> str:
+        async with sem:
+            return await chain.ainvoke({
+                "chunk": chunk.text,
+                "chunk_index": chunk.index + 1,
+                "chunk_count": len(chunks),
+                "timeline": "\n".join(format_timeline_entry(e) for e in chunk.timeline),
+            })
+
+    return list(await asyncio.gather(*(_one(c) for c in chunks)))
+
+
+def combine_chunk_notes(chunks: Sequence[TranscriptChunk], notes: Sequence[str]) -> str:
+    """Reduce input: ordered chunk notes, standing in for the full transcript."""
+    parts = [
+        f"[Part {c.index + 1}/{len(chunks)} from {c.start_time or 'start'}]\n{n.strip()}"
+        for c, n in zip(chunks, notes)
+    ]
+    return MAP_REDUCE_NOTES_HEADER + "\n\n".join(parts)
+
+
+async def condense_transcript(
+    llm: Runnable,
+    text: str,
+    timeline: Optional[Sequence[Dict[str, Any]]] = None,
+    *,
+    max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    concurrency: int = MAP_CONCURRENCY,
+) -> str:
+    """Chunk (timeline-aligned, token-budgeted) + map; returns the notes to reduce over."""
+    chunks = chunk_transcript(text, timeline, max_tokens=max_chunk_tokens)
+    print(f"Map-reduce: {estimate_tokens(text)} est. tokens -> {len(chunks)} chunks")
+    notes = await map_chunk_notes(llm, chunks, concurrency=concurrency)
+    return combine_chunk_notes(chunks, notes)
+
+
+if __name__ == "__main__":
+    print("Importing map_reduce.py")
@@ -1,6 +1,7 @@
 from ingestion.indexing.prompts.langsmith_client import langsmith_client  
 from typing import Dict   
 from langchain_core.prompts import PromptTemplate 
+from src.config.fake_llm import fake_llm_enabled
 
 
 
@@ -148,12 +149,71 @@ Here are some key points and instructions:
 MASTER_SUMMARY_PROMPT_TEMPLATE = PromptTemplate.from_template(MASTER_SUMMARY_PROMPT) 
 
 
+# ---------------------------
+# Map-reduce (long transcripts)
+# ---------------------------
+CHUNK_NOTES_PROMPT = """ 
+You are taking notes on one part of a biohacking podcast transcript. The transcript was split into {chunk_count} 
+consecutive parts; this is part {chunk_index}. Other parts are handled separately, so cover ONLY what is in this part 
+and do not guess what comes before or after. 
+
+The host's timeline entries that fall within this part (may be empty): 
+<timeline>
+{timeline}
+</timeline>
+
+<transcript_part>
+{chunk}
+</transcript_part>
+
+Write dense, ordered notes that keep every detail a later summary could need: 
+    - Products, compounds, supplements, treatments, protocols (doses, timing, steps), businesses, people, resources. 
+    - Claims and statements of effectiveness, with who made them. 
+    - Main topics in the order they come up. 
+
+After every fact add an <attribution> tag with the exact quote (20 words or fewer) and its timestamp, 
+e.g. <attribution>"…exact quote…" | 00:12:34</attribution>. Do not invent facts. 
+"""
+
+CHUNK_NOTES_PROMPT_TEMPLATE = PromptTemplate.from_template(CHUNK_NOTES_PROMPT)
+
+# Prepended to the combined chunk notes when they stand in for {transcript}/{full_transcript}
+MAP_REDUCE_NOTES_HEADER = (
+    "NOTE: This episode was too long to process in one pass. Below are ordered notes taken from "
+    "consecutive parts of the full transcript. The quotes and timestamps inside <attribution> tags "
+    "are verbatim from the transcript; treat the notes as the transcript.\n\n"
+)
 
 
 
 
 
 
+# Appended to every structured extractor prompt when the batch (list) tools are bound
+BATCH_EXTRACTION_INSTRUCTIONS = (
+    "\nSubmit EVERY distinct item found in the summary in ONE call to the tool, as a list. "
+    "Do not stop after the first item, do not split items across calls, and do not repeat an item.\n"
+)
+
+
+# ---------------------------
+# Multi-section (one call for every summary)
+# ---------------------------
+# The per-section instructions come from the summary prompts themselves; see
+# build_multi_section_prompt in indexing/section_summaries.py
+MULTI_SECTION_SUMMARY_INSTRUCTIONS = (
+    "You are writing several independent summaries of the same biohacking podcast transcript in a single response. "
+    "Each <section> below names one summary and gives its instructions; follow each section's instructions as if it were "
+    "the only task, and do not let one section refer to another.\n"
+    "Output format: write every section, in the order given, wrapped in a tag named after the section, e.g. "
+    "<product_information> … </product_information>. Always close each tag and write nothing outside the tags. "
+    "If a section has nothing to report, still emit its tags with one sentence saying so.\n\n"
+)
+MULTI_SECTION_TRANSCRIPT_FOOTER = "\nTranscript:\n{transcript}"
+
+
+
+
 def push_prompts(suffix: str, prompt_dict: Dict[str, str]):
     for key, value in prompt_dict.items():
         prompt_name = f"{key}_{suffix}"
@@ -179,20 +239,34 @@ prompt_names = {
     ]
 } 
 
+def pull_prompt(name: str):
+    """
+    Pull `name` from LangSmith. With the fake LLM backend the local template
+    is used instead, so offline runs and benchmarks never hit the network.
+    """
+    if not fake_llm_enabled():
+        return langsmith_client.pull_prompt(name)
+    if name == "master_summary_prompt":
+        return MASTER_SUMMARY_PROMPT_TEMPLATE
+    key, _, suffix = name.rpartition("_")
+    local = STRUCTURED_EXTRACTOR_PROMPTS if suffix == "structured" else SUMMARY_PROMPTS
+    return PromptTemplate.from_template(local[key])
+
+
 # Structured prompts
-product_information_structured_prompt = langsmith_client.pull_prompt("product_information_structured")
-medical_treatment_structured_prompt = langsmith_client.pull_prompt("medical_treatment_structured")
-claims_made_structured_prompt = langsmith_client.pull_prompt("claims_made_structured")
-businesses_entities_structured_prompt = langsmith_client.pull_prompt("businesses_entities_structured")
+product_information_structured_prompt = pull_prompt("product_information_structured")
+medical_treatment_structured_prompt = pull_prompt("medical_treatment_structured")
+claims_made_structured_prompt = pull_prompt("claims_made_structured")
+businesses_entities_structured_prompt = pull_prompt("businesses_entities_structured")
 
 # Summary prompts 
-product_information_summary_prompt = langsmith_client.pull_prompt("product_information_summary")
-medical_treatment_summary_prompt = langsmith_client.pull_prompt("medical_treatment_summary")
-high_level_overview_summary_prompt = langsmith_client.pull_prompt("high_level_overview_summary")
-claims_made_summary_prompt = langsmith_client.pull_prompt("claims_made_summary")
-businesses_entities_summary_prompt = langsmith_client.pull_prompt("businesses_entities_summary")
-compounds_summary_prompt = langsmith_client.pull_prompt("compounds_summary") 
-master_summary_prompt = langsmith_client.pull_prompt("master_summary_prompt") 
+product_information_summary_prompt = pull_prompt("product_information_summary")
+medical_treatment_summary_prompt = pull_prompt("medical_treatment_summary")
+high_level_overview_summary_prompt = pull_prompt("high_level_overview_summary")
+claims_made_summary_prompt = pull_prompt("claims_made_summary")
+businesses_entities_summary_prompt = pull_prompt("businesses_entities_summary")
+compounds_summary_prompt = pull_prompt("compounds_summary") 
+master_summary_prompt = pull_prompt("master_summary_prompt") 
 
 
 
@@ -0,0 +1,118 @@
+import asyncio
+import re
+from typing import Dict, List, Optional
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+
+from src.ingestion.indexing.prompts.transcript_prompts import (
+    MULTI_SECTION_SUMMARY_INSTRUCTIONS,
+    MULTI_SECTION_TRANSCRIPT_FOOTER,
+)
+
+SummaryStrategy = str  # "per_section" | "multi_section"
+
+# Trailing "Transcript:\n{transcript}" of a per-section summary prompt
+_TRANSCRIPT_TAIL_RE = re.compile(r"\s*(?:Transcript:\s*)?\{transcript\}\s*$", re.IGNORECASE)
+
+
+def section_instructions(summary_prompt: str) -> str:
+    """A summary prompt without its transcript slot, to be embedded in the multi-section prompt."""
+    text = _TRANSCRIPT_TAIL_RE.sub("", summary_prompt)
+    return text.replace("{transcript}", "the transcript below").strip()
+
+
+def build_multi_section_prompt(summary_prompts: Dict[str, str]) -> str:
+    """One prompt template (single {transcript} slot) asking for every section, each in its own tag."""
+    sections = "\n\n".join(
+        f'<section name="{key}">\n{section_instructions(prompt)}\n</section>'
+        for key, prompt in summary_prompts.items()
+    )
+    return MULTI_SECTION_SUMMARY_INSTRUCTIONS + sections + "\n" + MULTI_SECTION_TRANSCRIPT_FOOTER
+
+
+def parse_sections(text: str, keys: List[str]) -> Dict[str, str]:
+    """
+    Split a multi-section reply into {key: content}. A section counts when it
+    is closed, or when another section's opening tag follows it; a section cut
+    off at the end of the reply (output limit) or left empty is omitted.
+    """
+    any_open = "|".join(re.escape(k) for k in keys)
+    sections: Dict[str, str] = {}
+    for key in keys:
+        m = re.search(
+            rf"<{re.escape(key)}>(.*?)(?:</{re.escape(key)}>|(?=<(?:{any_open})>))",
+            text,
+            re.DOTALL,
+        )
+        if m and m.group(1).strip():
+            sections[key] = m.group(1).strip()
+    return sections
+
+
+async def summarize_per_section(
+    llm: Runnable,
+    summary_prompts: Dict[str, str],
+    transcript: str,
+    *,
+    concurrency: int,
+) -> Dict[str, str]:
+    """One call per summary prompt, run concurrently; each call resends the transcript."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _summarize(summary_prompt: str) -> str:
+        chain = PromptTemplate.from_template(summary_prompt) | llm | StrOutputParser()
+        async with sem:
+            return await chain.ainvoke({"transcript": transcript})
+
+    keys = list(summary_prompts.keys())
+    responses = await asyncio.gather(*(_summarize(summary_prompts[k]) for k in keys))
+    return dict(zip(keys, responses))
+
+
+async def summarize_multi_section(
+    llm: Runnable,
+    summary_prompts: Dict[str, str],
+    transcript: str,
+    *,
+    concurrency: int,
+) -> Dict[str, str]:
+    """
+    Every summary from a single call, so the transcript is sent once instead of
+    once per section. Sections that are missing, empty or truncated in the
+    reply are re-requested with their own prompt.
+    """
+    keys = list(summary_prompts.keys())
+    chain = PromptTemplate.from_template(build_multi_section_prompt(summary_prompts)) | llm | StrOutputParser()
+    reply: Optional[str] = None
+    try:
+        reply = await chain.ainvoke({"transcript": transcript})
+    except Exception as e:
+        print(f"Multi-section summary call failed: {e}")
+    sections = parse_sections(reply or "", keys)
+
+    missing = [k for k in keys if k not in sections]
+    if missing:
+        print(f"Multi-section summary: {len(sections)}/{len(keys)} sections parsed; per-section fallback for {missing}")
+        sections.update(await summarize_per_section(
+            llm, {k: summary_prompts[k] for k in missing}, transcript, concurrency=concurrency,
+        ))
+    return {k: sections[k] for k in keys}
+
+
+async def summarize_sections(
+    llm: Runnable,
+    summary_prompts: Dict[str, str],
+    transcript: str,
+    *,
+    strategy: SummaryStrategy = "per_section",
+    concurrency: int = 6,
+) -> Dict[str, str]:
+    if strategy == "multi_section":
+        return await summarize_multi_section(llm, summary_prompts, transcript, concurrency=concurrency)
+    return await summarize_per_section(llm, summary_prompts, transcript, concurrency=concurrency)
+
+
+if __name__ == "__main__":
+    print("Importing section_summaries.py")
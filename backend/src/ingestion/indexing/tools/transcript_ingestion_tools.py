@@ -4,17 +4,17 @@ from pydantic import BaseModel
 from langchain_core.tools import tool
 
 # Import Pydantic output models and their LLM settings
-from mongo_schemas import (
+from src.schemas.transcript_llm_schemas import (
     ProductOutput,
-    
     TreatmentOutput,
-  
     ClaimOutput,
-  
     BusinessOutput,
- 
     CompoundOutput,
-   
+    ProductOutputs,
+    TreatmentOutputs,
+    ClaimOutputs,
+    BusinessOutputs,
+    CompoundOutputs,
 )
 
 
@@ -191,3 +191,84 @@ TOOLS = [
     submit_businesses_entities,
     submit_compound,
 ]
+
+
+# -------------------------
+# Batch tools: every entity of a type in one call
+# -------------------------
+
+def _batch(model_cls: type, items: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    return [_to_dict(item if isinstance(item, BaseModel) else model_cls(**item)) for item in items or []]
+
+
+@tool(
+    "submit_products",
+    args_schema=ProductOutputs,
+    return_direct=True,
+    description="Submit every product found in the summary, as a list, in a single call",
+)
+def submit_products(products: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Provide all products at once. Args follow ProductOutputs."""
+    return _batch(ProductOutput, products)
+
+
+@tool(
+    "submit_medical_treatments",
+    args_schema=TreatmentOutputs,
+    return_direct=True,
+    description="Submit every medical treatment found in the summary, as a list, in a single call",
+)
+def submit_medical_treatments(treatments: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Provide all medical treatments at once. Args follow TreatmentOutputs."""
+    return _batch(TreatmentOutput, treatments)
+
+
+@tool(
+    "submit_claims",
+    args_schema=ClaimOutputs,
+    return_direct=True,
+    description="Submit every explicit claim found in the summary, as a list, in a single call",
+)
+def submit_claims(claims: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Provide all claims at once. Args follow ClaimOutputs."""
+    return _batch(ClaimOutput, claims)
+
+
+@tool(
+    "submit_businesses",
+    args_schema=BusinessOutputs,
+    return_direct=True,
+    description="Submit every business/entity found in the summary, as a list, in a single call",
+)
+def submit_businesses(businesses: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Provide all businesses/entities at once. Args follow BusinessOutputs."""
+    return _batch(BusinessOutput, businesses)
+
+
+@tool(
+    "submit_compounds",
+    args_schema=CompoundOutputs,
+    return_direct=True,
+    description="Submit every compound found in the summary, as a list, in a single call",
+)
+def submit_compounds(compounds: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Provide all compounds at once. Args follow CompoundOutputs."""
+    return _batch(CompoundOutput, compounds)
+
+
+BATCH_TOOLS = [
+    submit_products,
+    submit_medical_treatments,
+    submit_claims,
+    submit_businesses,
+    submit_compounds,
+]
+
+# Batch tool name -> the list argument holding its entities
+BATCH_TOOL_LIST_FIELDS: Dict[str, str] = {
+    "submit_products": "products",
+    "submit_medical_treatments": "treatments",
+    "submit_claims": "claims",
+    "submit_businesses": "businesses",
+    "submit_compounds": "compounds",
+}
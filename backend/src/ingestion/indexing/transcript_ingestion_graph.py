@@ -15,6 +15,7 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate 
 from langchain_core.runnables import Runnable 
 import json  
+from bson import DBRef
 from dotenv import load_dotenv   
 from pydantic import BaseModel, Field   
 from langchain_core.tools import tool   
@@ -29,6 +30,8 @@ from ingestion.indexing.prompts.transcript_prompts import (
     claims_made_summary_prompt,
     businesses_entities_summary_prompt,
     compounds_summary_prompt,
+    BATCH_EXTRACTION_INSTRUCTIONS,
+    STRUCTURED_EXTRACTOR_PROMPTS as DEFAULT_STRUCTURED_EXTRACTOR_PROMPTS,
 ) 
 from ingestion.indexing.tools.transcript_ingestion_tools import (
     submit_product_information,
@@ -36,21 +39,32 @@ from ingestion.indexing.tools.transcript_ingestion_tools import (
     submit_claims_made,
     submit_businesses_entities,
     submit_compound,
+    submit_products,
+    submit_medical_treatments,
+    submit_claims,
+    submit_businesses,
+    submit_compounds,
+    BATCH_TOOL_LIST_FIELDS,
 )  
-from mongo_schemas import (
+from src.schemas.transcript_llm_schemas import (
     ProductOutput,
-    
     TreatmentOutput,
-  
     ClaimOutput,
-  
     BusinessOutput,
- 
     CompoundOutput,
-    Product, 
-    init_beanie_with_pymongo, 
-   
-) 
+)
+from src.mongo_schema_overwrite import Episode, Transcript, TranscriptStructured
+from src.config.mongo_setup import init_beanie_with_pymongo
+from src.config.llm_cache import install_llm_cache
+from src.config.llm_rate_limit import PROVIDER_ANTHROPIC, PROVIDER_GOOGLE, rate_limited
+from src.config.fake_llm import LLM_BACKEND_FAKE, fake_llm_enabled, make_fake_chat_model
+from src.ingestion.utils.content_hash import content_hash, version_hash
+from src.ingestion.utils.transcript_storage import save_full_transcript
+from src.ingestion.indexing.map_reduce import condense_transcript, use_map_reduce
+from src.ingestion.indexing.section_summaries import summarize_sections
+from src.ingestion.indexing.checkpointing import clear_thread, get_checkpointer, thread_config
+from src.ingestion.indexing.entity_persistence import ENTITY_SPECS, group_entities, persist_entities
+from src.ingestion.indexing.prompts.transcript_prompts import CHUNK_NOTES_PROMPT
 
 
 
@@ -61,8 +75,24 @@ load_dotenv()
 nest_asyncio.apply()    
 
 
-anthropic_vertex = ChatAnthropicVertex(model="claude-3-5-sonnet-20240620")   
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", api_key=os.getenv("GOOGLE_FREE_API_KEY")) 
+ANTHROPIC_MODEL = "claude-3-5-sonnet-20240620"
+GOOGLE_MODEL = "gemini-2.0-flash"
+
+if fake_llm_enabled():
+    # LLM_BACKEND=fake: offline, deterministic models for benchmarks (see benchmark_pipeline.py)
+    anthropic_vertex = make_fake_chat_model(ANTHROPIC_MODEL)
+    llm = make_fake_chat_model(GOOGLE_MODEL)
+else:
+    anthropic_vertex = ChatAnthropicVertex(model=ANTHROPIC_MODEL)   
+    llm = ChatGoogleGenerativeAI(model=GOOGLE_MODEL, api_key=os.getenv("GOOGLE_FREE_API_KEY")) 
+
+# Identical prompt+model+params calls (re-runs after a crash or code change) come from disk
+install_llm_cache()
+
+# Every model call waits on the shared per-provider RPM/TPM budget. The models
+# live here rather than in graph state so checkpoints hold only plain data.
+google_llm = rate_limited(llm, PROVIDER_GOOGLE)
+anthropic_vertex_llm = rate_limited(anthropic_vertex, PROVIDER_ANTHROPIC)
 
 
 
@@ -89,6 +119,15 @@ TOOL_MAP = {
     "compounds": submit_compound,
 }
 
+# List-valued variants bound for extraction: one call returns every entity of a type
+BATCH_TOOL_MAP = {
+    "product_information": submit_products,
+    "medical_treatment": submit_medical_treatments,
+    "claims_made": submit_claims,
+    "businesses_entities": submit_businesses,
+    "compounds": submit_compounds,
+}
+
 
 
 # ---------------------------
@@ -133,29 +172,93 @@ STRUCTURED_EXTRACTOR_PROMPTS: Dict[str, str] = {
     "businesses_entities": (
         businesses_entities_structured_prompt.template
     ),
+    # No hub prompt for compounds yet; use the local default
+    "compounds": (
+        DEFAULT_STRUCTURED_EXTRACTOR_PROMPTS["compounds"]
+    ),
 } 
 
 
 
 
+# Summary chains in flight at once per transcript (one per SUMMARY_PROMPTS key by default)
+SUMMARY_CONCURRENCY = 6
+
+# Provider behind each STRUCTURED_OUTPUT_MODELS entry, and in-flight caps per provider
+STRUCTURED_MODEL_PROVIDERS: Dict[str, str] = {
+    "product_information": PROVIDER_GOOGLE,
+    "medical_treatment": PROVIDER_GOOGLE,
+    "claims_made": PROVIDER_ANTHROPIC,
+    "businesses_entities": PROVIDER_ANTHROPIC,
+    "compounds": PROVIDER_ANTHROPIC,
+}
+PROVIDER_CONCURRENCY: Dict[str, int] = {PROVIDER_GOOGLE: 4, PROVIDER_ANTHROPIC: 2}
+
+# Bump to force re-ingestion when graph logic (not prompts/models) changes
+INGESTION_VERSION = "2"  # 2: list-valued extraction (every entity per call)
+
+# Everything that shapes the stored summaries/extractions; see run_transcript_ingestion
+SUMMARY_VERSION_HASH = version_hash(
+    INGESTION_VERSION,
+    GOOGLE_MODEL,
+    ANTHROPIC_MODEL,
+    SUMMARY_PROMPTS,
+    STRUCTURED_EXTRACTOR_PROMPTS,
+    CHUNK_NOTES_PROMPT,
+    BATCH_EXTRACTION_INSTRUCTIONS,
+    # Fake-backend output must never look current to a live run
+    *([LLM_BACKEND_FAKE] if fake_llm_enabled() else []),
+)
+
+# summary key -> Transcript field
+TRANSCRIPT_SUMMARY_FIELDS: Dict[str, str] = {
+    "product_information": "product_summary",
+    "medical_treatment": "medical_treatment_summary",
+    "high_level_overview": "high_level_overview_summary",
+    "claims_made": "claims_made_summary",
+    "businesses_entities": "business_summary",
+    "compounds": "compound_summary",
+}
+
+# structured_tool_call_dict key -> TranscriptStructured field
+TRANSCRIPT_STRUCTURED_FIELDS: Dict[str, str] = {
+    "product_information": "product",
+    "medical_treatment": "medical_treatment",
+    "claims_made": "claims_made",
+    "businesses_entities": "businesses",
+    "compounds": "compounds",
+}
+
+
 class TranscriptIngestionState(TypedDict, total=False):
     input: str
     aggregate_summary: str
     final_summary: str   
     summary_prompts_dict: Dict[str, str]
     full_transcript: Document  
+    # "single" sends the whole transcript to each summary prompt; "map_reduce"
+    # summarizes timeline-aligned chunks first; "auto" picks by transcript length
+    summarization_mode: Literal["single", "map_reduce", "auto"]
+    timeline: List[Dict[str, Any]]
+    summary_input: str
+    # "per_section" = one call per summary prompt; "multi_section" = one tagged call for all
+    summary_strategy: Literal["per_section", "multi_section"]
     product_information: str
     medical_treatment: str 
     structured_tool_call_dict: Dict[str, Any] 
     high_level_overview: str
     claims_made: str
     businesses_entities: str 
+    compounds: str
     structured_output_prompts_dict: Dict[str, str]
     structured_output_dict: Dict[str, Any] 
-    structured_output_tool_dict: Dict[str, Tool]   
-    anthropic_vertex_llm: ChatAnthropicVertex   
-    google_llm: ChatGoogleGenerativeAI   
-    structured_output_models: Dict[str, Any] 
+    # Identify the transcript/prompts a checkpoint was made from (see run_transcript_ingestion)
+    transcript_hash: str
+    version_hash: str
+    # Where persist_extracted_entities writes; without them the node is a no-op
+    episode_id: str
+    transcript_id: str
+    persisted_entity_ids: Dict[str, List[str]]
 
 
 
@@ -202,6 +305,41 @@ def parse_tool_call_or_json(message, tool_map: Dict[str, Tool]):
     return None, None
 
 
+def collect_tool_calls(message) -> List[tuple]:
+    """Every (tool_name, args) in a model message, in order; same sources as parse_tool_call_or_json."""
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return [(call.get("name"), call.get("args") or {}) for call in tool_calls]
+
+    additional_kwargs = getattr(message, "additional_kwargs", {}) or {}
+    function_call = additional_kwargs.get("function_call")
+    if isinstance(function_call, dict):
+        _, args = parse_tool_call_or_json(message, {})
+        return [(function_call.get("name"), args or {})]
+
+    _, args = parse_tool_call_or_json(message, {})
+    if isinstance(args, list):
+        return [(None, a) for a in args if isinstance(a, dict)]
+    return [(None, args)] if isinstance(args, dict) else []
+
+
+def collect_entities(message, list_field: str) -> List[Dict[str, Any]]:
+    """
+    Flatten every entity out of a message: batch tool calls contribute their
+    list argument (`list_field`, or the one named in BATCH_TOOL_LIST_FIELDS),
+    single-entity calls and bare JSON objects contribute themselves.
+    """
+    entities: List[Dict[str, Any]] = []
+    for name, args in collect_tool_calls(message):
+        field = BATCH_TOOL_LIST_FIELDS.get(name, list_field)
+        items = args.get(field) if isinstance(args, dict) else None
+        if isinstance(items, list):
+            entities.extend(i for i in items if isinstance(i, dict))
+        elif args:
+            entities.append(args)
+    return entities
+
+
 async def return_tool_call_dict(tool_response, tool_map): 
     tool_to_call, arguments_loaded = parse_tool_call_or_json(tool_response, tool_map)
     print(arguments_loaded)
@@ -226,93 +364,357 @@ initial_state: TranscriptIngestionState = {
     "summary_prompts_dict": SUMMARY_PROMPTS, 
     "structured_output_prompts_dict": STRUCTURED_EXTRACTOR_PROMPTS,
     "full_transcript": "",
+    "summarization_mode": "auto",
+    "timeline": [],
+    "summary_input": "",
+    "summary_strategy": "per_section",
     "product_information": "",
     "medical_treatment": "",
     "high_level_overview": "",
     "claims_made": "",
     "businesses_entities": "", 
+    "compounds": "",
     "structured_tool_call_dict": {},
-    "structured_output_tool_dict": TOOL_MAP,
-    "anthropic_vertex_llm": anthropic_vertex,
-    "google_llm": llm,
-    "structured_output_models": {   
-        "product_information": llm.bind_tools([submit_product_information]),
-        "medical_treatment": llm.bind_tools([submit_medical_treatment]),
-        "claims_made": anthropic_vertex.bind_tools([submit_claims_made]),
-        "businesses_entities": anthropic_vertex.bind_tools([submit_businesses_entities]),
-        "compounds": anthropic_vertex.bind_tools([submit_compound]),
-    },
 }
 
 
+STRUCTURED_OUTPUT_MODELS: Dict[str, Runnable] = {   
+    key: rate_limited(
+        (llm if STRUCTURED_MODEL_PROVIDERS[key] == PROVIDER_GOOGLE else anthropic_vertex).bind_tools([batch_tool]),
+        STRUCTURED_MODEL_PROVIDERS[key],
+    )
+    for key, batch_tool in BATCH_TOOL_MAP.items()
+}
 
 
-async def generate_summaries(state: TranscriptIngestionState) -> TranscriptIngestionState:  
 
+
+async def map_transcript_chunks(state: TranscriptIngestionState) -> TranscriptIngestionState:
+    """
+    Decide what the summary prompts read. Long transcripts (or mode
+    "map_reduce") are split into token-budgeted, timeline-aligned chunks whose
+    notes are produced in parallel; the combined notes replace the transcript
+    for the reduce step, so nothing is truncated.
+    """
+    full_transcript = state.get("full_transcript", "")
+    text = full_transcript.page_content
+    if use_map_reduce(text, state.get("summarization_mode", "auto")):
+        state["summary_input"] = await condense_transcript(google_llm, text, state.get("timeline") or [])
+    else:
+        state["summary_input"] = text
+    return {**state}
+
+
+async def generate_summaries(state: TranscriptIngestionState) -> TranscriptIngestionState:  
+    """
+    Produce every SUMMARY_PROMPTS section. "per_section" runs one call per
+    prompt concurrently (bounded by SUMMARY_CONCURRENCY); "multi_section" asks
+    for all sections in one tagged call, so the transcript is sent once, and
+    falls back to per-section calls for any section it could not parse.
+    aggregate_summary is always assembled in SUMMARY_PROMPTS order.
+    """
     full_transcript = state.get("full_transcript", "")   
 
     summary_prompts_dict = state.get("summary_prompts_dict", {})    
 
+    # Chunk notes in map-reduce mode, the transcript itself otherwise
+    summary_input = state.get("summary_input") or full_transcript.page_content
 
-    for summary_key, summary_prompt in summary_prompts_dict.items():   
+    summaries = await summarize_sections(
+        google_llm,
+        summary_prompts_dict,
+        summary_input,
+        strategy=state.get("summary_strategy", "per_section"),
+        concurrency=SUMMARY_CONCURRENCY,
+    )
 
-        prompt_template = PromptTemplate.from_template(summary_prompt)   
-        
-        chain = prompt_template | state.get("google_llm") | StrOutputParser()   
-        response = await chain.ainvoke({"transcript": full_transcript.page_content})   
+    aggregate_summary = state.get("aggregate_summary", "")
+    for summary_key, response in summaries.items():
         state[summary_key] = response   
-        state["aggregate_summary"] += f"\n{summary_key}. {response}"   
+        aggregate_summary += f"\n{summary_key}. {response}"   
+    state["aggregate_summary"] = aggregate_summary
         
     return {**state}     
 
 async def structured_extraction(state: TranscriptIngestionState) -> TranscriptIngestionState:   
+    """
+    Extract every entity type concurrently, one call per type: the bound batch
+    tools take a list, and every tool call in the reply is collected. Each call
+    holds a slot of its provider's semaphore (PROVIDER_CONCURRENCY), so Gemini
+    and Anthropic calls overlap without exceeding either provider's cap. Keys
+    without a model, prompt or summary are skipped rather than ending the node.
+    structured_tool_call_dict[key] is the list of extracted entity dicts.
+
+    If any call fails the node raises once all calls have settled, so the run
+    is never stored (and marked current) with an entity type missing; the
+    checkpoint stays before this node, and on resume the keys that did succeed
+    come back from the LLM cache.
+    """
+    structured_output_models = STRUCTURED_OUTPUT_MODELS
+
+    structured_extractor_prompts_dict = state.get("structured_output_prompts_dict", {})    
 
-    structured_output_tools = state.get("structured_output_tool_dict", {})    
+    provider_sems = {p: asyncio.Semaphore(n) for p, n in PROVIDER_CONCURRENCY.items()}
 
-    structured_output_models = state.get("structured_output_models", {})   
+    async def _extract(key: str, structured_model, prompt: str, specific_summary: str):
+        prompt_template = PromptTemplate.from_template(prompt + BATCH_EXTRACTION_INSTRUCTIONS) 
+        chain = prompt_template | structured_model     
+        sem = provider_sems.get(STRUCTURED_MODEL_PROVIDERS.get(key, PROVIDER_GOOGLE), provider_sems[PROVIDER_GOOGLE])
+        async with sem:
+            response = await chain.ainvoke({"summary": specific_summary})    
+        list_field = BATCH_TOOL_LIST_FIELDS[BATCH_TOOL_MAP[key].name]
+        return key, collect_entities(response, list_field)
+
+    keys, jobs = [], []
+    for key in BATCH_TOOL_MAP:
+        structured_model = structured_output_models.get(key)    
+        prompt = structured_extractor_prompts_dict.get(key)    
+        specific_summary = state.get(key, "")
+        if structured_model is None or not prompt or not specific_summary:
+            continue
+        keys.append(key)
+        jobs.append(_extract(key, structured_model, prompt, specific_summary))
+
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+
+    structured_tool_call_dict = dict(state.get("structured_tool_call_dict") or {})
+    failures: Dict[str, BaseException] = {}
+    for key, result in zip(keys, results):
+        if isinstance(result, BaseException):
+            print(f"Structured extraction failed for {key}: {result}")
+            failures[key] = result
+            continue
+        _, entities = result
+        print(f"{key}: {len(entities)} extracted")
+        structured_tool_call_dict[key] = entities
+    if failures:
+        raise RuntimeError(
+            f"Structured extraction failed for {sorted(failures)}"
+        ) from next(iter(failures.values()))
+    state["structured_tool_call_dict"] = structured_tool_call_dict
+
+    return {**state} 
+
+
+
+
+async def persist_extracted_entities(state: TranscriptIngestionState) -> TranscriptIngestionState:
+    """
+    Bulk-upsert the extracted entities (one write per collection, deduped by
+    normalized name) and link them into the episode's mentions. Skipped when
+    the run has no episode/transcript ids, e.g. offline benchmarks.
+    """
+    episode_id = state.get("episode_id")
+    transcript_id = state.get("transcript_id")
+    if not episode_id or not transcript_id:
+        print("No episode/transcript id in state; skipping entity persistence")
+        return {**state}
+
+    state["persisted_entity_ids"] = await persist_entities(
+        state.get("structured_tool_call_dict") or {},
+        episode_id=episode_id,
+        transcript_id=transcript_id,
+    )
+    return {**state}
 
-    structured_extractor_prompts_dict = state.get("structured_output_prompts_dict", {})    
 
-    for key, tool in structured_output_tools.items(): 
-        structured_model = structured_output_models.get(key, None)    
-        prompt = structured_extractor_prompts_dict.get(key, "")    
 
 
-        if structured_model is None or prompt is None:  
-            return None    
-        
-        prompt_template = PromptTemplate.from_template(prompt) 
-        if state.get(key, "") == "": continue  
+graph = StateGraph(TranscriptIngestionState)
+graph.add_node("map_transcript_chunks", map_transcript_chunks)
+graph.add_node("generate_summaries", generate_summaries)
+graph.add_node("structured_extraction", structured_extraction)
+graph.add_node("persist_extracted_entities", persist_extracted_entities)
 
-        specific_summary = state.get(key, "")    
-        chain = prompt_template | structured_model     
-        response = await chain.ainvoke({"summary": specific_summary})    
+graph.add_edge(START, "map_transcript_chunks")
+graph.add_edge("map_transcript_chunks", "generate_summaries")
+graph.add_edge("generate_summaries", "structured_extraction")
+graph.add_edge("structured_extraction", "persist_extracted_entities")
+graph.add_edge("persist_extracted_entities", END)
 
-        tool_to_call, arguments_loaded = await return_tool_call_dict(response, structured_output_tools)  
+app = graph.compile()
 
-        state["structured_tool_call_dict"][key] = arguments_loaded  
 
 
 
 
+def _as_dict(value: Any) -> Optional[Dict[str, Any]]:
+    if value is None:
+        return None
+    if isinstance(value, list):
+        # Batch extraction: every entity of the type
+        return {"items": [_as_dict(v) for v in value]}
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return value if isinstance(value, dict) else {"value": value}
 
-        return {**state} 
 
+async def _store_ingestion_results(
+    episode: Episode,
+    transcript: Optional[Transcript],
+    transcript_text: str,
+    final_state: TranscriptIngestionState,
+    text_hash: str,
+) -> Transcript:
+    if transcript is None:
+        transcript = await _ensure_transcript(episode, None)
 
+    for summary_key, field in TRANSCRIPT_SUMMARY_FIELDS.items():
+        if final_state.get(summary_key):
+            setattr(transcript, field, final_state[summary_key])
+    transcript.master_aggregate_summary = final_state.get("aggregate_summary") or None
 
+    tool_calls = final_state.get("structured_tool_call_dict") or {}
+    transcript.structured = TranscriptStructured(**{
+        field: _as_dict(tool_calls.get(key)) for key, field in TRANSCRIPT_STRUCTURED_FIELDS.items()
+    })
+    transcript.content_hash = text_hash
+    transcript.summary_version_hash = SUMMARY_VERSION_HASH
+    await transcript.save()
+    await save_full_transcript(transcript, transcript_text)
+    return transcript
 
-graph = StateGraph(TranscriptIngestionState)
-graph.add_node("generate_summaries", generate_summaries)
-graph.add_node("structured_extraction", structured_extraction)
 
-graph.add_edge(START, "generate_summaries")
-graph.add_edge("generate_summaries", "structured_extraction")
-graph.add_edge("structured_extraction", END)
+async def _ensure_transcript(episode: Episode, transcript: Optional[Transcript]) -> Transcript:
+    """
+    The episode's Transcript, created and linked first if missing. Linked with
+    a targeted $set (not episode.save()) so mentions written by the
+    persistence node are never overwritten by a stale in-memory episode.
+    """
+    if transcript is not None:
+        return transcript
+    transcript = Transcript()
+    await transcript.insert()
+    await Episode.get_pymongo_collection().update_one(
+        {"_id": episode.id},
+        {"$set": {"transcript": DBRef(Transcript.get_pymongo_collection().name, transcript.id)}},
+    )
+    episode.transcript = transcript  # type: ignore[assignment]
+    return transcript
 
-app = graph.compile()
 
+async def _linked_transcript(episode: Episode) -> Optional[Transcript]:
+    if episode.transcript is None:
+        return None
+    if isinstance(episode.transcript, Transcript):
+        return episode.transcript
+    return await episode.transcript.fetch()
 
 
+def _is_current(transcript: Optional[Transcript], text_hash: str) -> bool:
+    return (
+        transcript is not None
+        and transcript.content_hash == text_hash
+        and transcript.summary_version_hash == SUMMARY_VERSION_HASH
+    )
+
+
+async def transcript_is_current(episode: Episode, transcript_text: str) -> bool:
+    """True when run_transcript_ingestion would skip this episode (no LLM calls needed)."""
+    return _is_current(await _linked_transcript(episode), content_hash(transcript_text))
+
+
+def _missing_extractions(state: TranscriptIngestionState) -> List[str]:
+    """Entity types that had a model, prompt and summary but no extraction result."""
+    extracted = state.get("structured_tool_call_dict") or {}
+    prompts = state.get("structured_output_prompts_dict") or {}
+    return [
+        key for key in BATCH_TOOL_MAP
+        if STRUCTURED_OUTPUT_MODELS.get(key) is not None and prompts.get(key) and state.get(key)
+        and key not in extracted
+    ]
+
+
+async def _ingestion_app():
+    """The compiled graph with the SQLite checkpointer attached, if available."""
+    saver = await get_checkpointer()
+    return (graph.compile(checkpointer=saver) if saver is not None else app), saver
+
+
+async def run_transcript_ingestion(
+    episode: Episode,
+    transcript_text: str,
+    *,
+    force: bool = False,
+    summarization_mode: Literal["single", "map_reduce", "auto"] = "auto",
+    summary_strategy: Literal["per_section", "multi_section"] = "per_section",
+    resume: bool = True,
+) -> Optional[TranscriptIngestionState]:
+    """
+    Run the ingestion graph for one episode and store the results on its Transcript.
+
+    Skipped (returns None) when the linked Transcript was last ingested from the
+    same normalized text (content_hash) with the same prompts/models
+    (summary_version_hash), so repeated or scheduled runs make no LLM calls for
+    unchanged content. `force=True` always re-runs.
+
+    Each node's output is checkpointed under the episode id. If an earlier run
+    for the same text and prompts died part-way (or after the graph finished
+    but before the results were stored), it is picked up from the last
+    completed node instead of starting over: if structured extraction fails,
+    the error propagates with the checkpoint left after generate_summaries, so
+    the next run redoes extraction only. Checkpoints are dropped once every
+    entity type has been extracted and the results are saved; `resume=False`
+    discards them and starts fresh.
+    """
+    text_hash = content_hash(transcript_text)
+    transcript = await _linked_transcript(episode)
+
+    if not force and _is_current(transcript, text_hash):
+        print(f"Episode {episode.episode_number}: transcript unchanged since last ingestion; skipping")
+        return None
+
+    # Created up front so the persistence node can link claims to it
+    transcript = await _ensure_transcript(episode, transcript)
+
+    ingestion_app, saver = await _ingestion_app()
+    thread_id = str(episode.id)
+    config = thread_config(thread_id)
+
+    snapshot = await ingestion_app.aget_state(config) if saver is not None else None
+    previous = (snapshot.values if snapshot is not None else None) or {}
+    resumable = (
+        resume
+        and previous.get("transcript_hash") == text_hash
+        and previous.get("version_hash") == SUMMARY_VERSION_HASH
+    )
+
+    if resumable and not snapshot.next and _missing_extractions(previous):
+        # Finished with entity types missing: rewind to just before extraction
+        await ingestion_app.aupdate_state(config, {}, as_node="generate_summaries")
+        snapshot = await ingestion_app.aget_state(config)
+
+    if resumable and not snapshot.next:
+        print(f"Episode {episode.episode_number}: reusing completed graph run from checkpoint")
+        final_state = previous
+    elif resumable:
+        print(f"Episode {episode.episode_number}: resuming ingestion at {list(snapshot.next)}")
+        final_state = await ingestion_app.ainvoke(None, config)
+    else:
+        if previous:
+            await clear_thread(saver, thread_id)
+        final_state = await ingestion_app.ainvoke({
+            **initial_state,
+            "aggregate_summary": "",
+            "structured_tool_call_dict": {},
+            "full_transcript": Document(page_content=transcript_text),
+            "summarization_mode": summarization_mode,
+            "summary_strategy": summary_strategy,
+            "timeline": episode.timeline or [],
+            "transcript_hash": text_hash,
+            "version_hash": SUMMARY_VERSION_HASH,
+            "episode_id": str(episode.id),
+            "transcript_id": str(transcript.id),
+        }, config)
+
+    missing = _missing_extractions(final_state)
+    if missing:
+        # Never mark the transcript current (or drop the checkpoint) with entity types missing
+        raise RuntimeError(f"Episode {episode.episode_number}: no extraction for {missing}")
+
+    await _store_ingestion_results(episode, transcript, transcript_text, final_state, text_hash)
+    await clear_thread(saver, thread_id)
+    return final_state
 
 
 async def run_graph(transcript: Document):
@@ -377,7 +779,7 @@ if __name__ == "__main__":
 
 
 
-    llm_with_tools = llm.bind_tools([submit_product_information])  
+    llm_with_tools = llm.bind_tools([submit_products])  
 
     next_chain = product_information_structured_prompt | llm_with_tools  
 
@@ -385,28 +787,9 @@ if __name__ == "__main__":
 
     print(next_response)   
 
-    py_model = return_tool_call_dict_sync(next_response, TOOL_MAP)  
-
-
-    async def store_product_information(py_model: ProductOutput): 
-        await init_beanie_with_pymongo() 
-
-        product = Product(
-            name=py_model.name,
-            description=py_model.description,
-            features=py_model.features,
-            protocols=py_model.protocols,
-            benefits_as_stated=py_model.benefits_as_stated,
-            attribution_quotes=py_model.attribution_quotes,
-        )   
-
-        await product.save() 
-
-    asyncio.run(store_product_information(py_model)) 
-
-
-
-
-
-
+    products = collect_entities(next_response, "products")
 
+    # Entities are stored by the persist_extracted_entities node (needs an episode);
+    # show the normalized groups it would upsert
+    for key, fields in group_entities(ENTITY_SPECS["product_information"], products).items():
+        print(key, fields)
@@ -0,0 +1,29 @@
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any
+
+
+def normalize_transcript_text(text: str) -> str:
+    """NFKC + collapsed whitespace, so re-fetches that only differ in layout hash the same."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_hash(text: str) -> str:
+    """sha256 of the normalized transcript text."""
+    return hashlib.sha256(normalize_transcript_text(text).encode("utf-8")).hexdigest()
+
+
+def version_hash(*parts: Any) -> str:
+    """
+    sha256 over everything that shapes an LLM output (prompt templates, model
+    names, version tags). Changing any part invalidates stored summaries.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+if __name__ == "__main__":
+    print("Importing content_hash.py")
@@ -0,0 +1,31 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Optional
+
+_MARKS_RE = re.compile(r"[®™©℠]")
+_APOSTROPHE_RE = re.compile(r"['’‘`]")
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+_LEADING_ARTICLE_RE = re.compile(r"^(?:the|a|an)\s+")
+
+
+@lru_cache(maxsize=65536)
+def normalize_entity_name(name: Optional[str]) -> str:
+    """
+    Dedup key for an extracted entity name: NFKC, case-folded, trademark
+    signs and punctuation dropped, '&' read as 'and', leading article and
+    extra whitespace removed. "The Bulletproof Coffee®" -> "bulletproof coffee".
+    """
+    if not name:
+        return ""
+    # Marks go before NFKC, which would expand ™ to "TM"
+    text = unicodedata.normalize("NFKC", _MARKS_RE.sub("", name)).casefold()
+    text = _APOSTROPHE_RE.sub("", text).replace("&", " and ")
+    text = _NON_WORD_RE.sub(" ", text).replace("_", " ")
+    text = _SPACE_RE.sub(" ", text).strip()
+    return _LEADING_ARTICLE_RE.sub("", text)
+
+
+if __name__ == "__main__":
+    print("Importing entity_names.py")
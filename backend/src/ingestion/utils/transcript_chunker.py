@@ -0,0 +1,136 @@
+import bisect
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.mongo_schema_overwrite import TranscriptSegment
+from src.ingestion.utils.transcript_segmenter import segment_transcript
+
+# Rough chars-per-token for English prose; good enough to stay under a context budget
+CHARS_PER_TOKEN = 4
+DEFAULT_CHUNK_TOKENS = 6000
+
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})(?::(\d{2}))?")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[int]:
+    """'01:02:03' / '12:34' / '(00:12:34)' -> seconds."""
+    if not value:
+        return None
+    m = _TIME_RE.search(str(value))
+    if not m:
+        return None
+    a, b, c = m.groups()
+    if c is None:
+        return int(a) * 60 + int(b)
+    return int(a) * 3600 + int(b) * 60 + int(c)
+
+
+def timeline_entry_time(entry: Dict[str, Any]) -> Optional[int]:
+    return parse_timestamp(entry.get("time") or entry.get("timestamp"))
+
+
+def format_timeline_entry(entry: Dict[str, Any]) -> str:
+    return f"{(entry.get('time') or entry.get('timestamp') or '')}: {(entry.get('description') or entry.get('text') or '')}"
+
+
+@dataclass
+class TranscriptChunk:
+    index: int
+    char_start: int
+    char_end: int
+    text: str
+    start_time: Optional[str] = None
+    timeline: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+def _sections(
+    segments: Sequence[TranscriptSegment],
+    boundaries: List[int],
+) -> List[List[TranscriptSegment]]:
+    """Group consecutive segments by the timeline entry they fall under."""
+    sections: List[List[TranscriptSegment]] = []
+    current_bucket = None
+    for seg in segments:
+        t = parse_timestamp(seg.start_time)
+        bucket = bisect.bisect_right(boundaries, t) if t is not None else current_bucket
+        if not sections or bucket != current_bucket:
+            sections.append([])
+            current_bucket = bucket
+        sections[-1].append(seg)
+    return sections
+
+
+def chunk_transcript(
+    text: str,
+    timeline: Optional[Sequence[Dict[str, Any]]] = None,
+    *,
+    max_tokens: int = DEFAULT_CHUNK_TOKENS,
+    segments: Optional[Sequence[TranscriptSegment]] = None,
+) -> List[TranscriptChunk]:
+    """
+    Split a transcript into consecutive chunks of at most ~max_tokens.
+
+    Cuts fall on speaker-segment boundaries and, where the timeline allows,
+    between timeline topics: whole topics are packed into a chunk until the
+    budget is reached, and a topic larger than the budget is split by segments.
+    Chunks are contiguous and together cover the entire text; nothing is dropped.
+    """
+    if not text:
+        return []
+    segments = list(segments) if segments is not None else segment_transcript(text)
+    if not segments:
+        segments = [TranscriptSegment(char_start=0, char_end=len(text), text=text)]
+
+    timeline = [e for e in (timeline or []) if timeline_entry_time(e) is not None]
+    timeline.sort(key=timeline_entry_time)
+    boundaries = sorted({timeline_entry_time(e) for e in timeline})
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    # (start, end) char ranges of each chunk, cut at segment starts
+    cuts: List[int] = []
+    chunk_start = 0
+    for section in _sections(segments, boundaries):
+        section_start = section[0].char_start
+        section_end = section[-1].char_end
+        if section_end - chunk_start <= max_chars:
+            continue
+        # The topic doesn't fit: close the chunk before it if it holds anything
+        if section_start > chunk_start:
+            cuts.append(section_start)
+            chunk_start = section_start
+        # ...and split the topic itself by segments while it is over budget
+        for seg in section:
+            if seg.char_end - chunk_start > max_chars and seg.char_start > chunk_start:
+                cuts.append(seg.char_start)
+                chunk_start = seg.char_start
+
+    bounds: List[Tuple[int, int]] = list(zip([0, *cuts], [*cuts, len(text)]))
+    seg_starts = [s.char_start for s in segments]
+    chunks: List[TranscriptChunk] = []
+    for i, (a, b) in enumerate(bounds):
+        first_seg = segments[max(0, bisect.bisect_right(seg_starts, a) - 1)]
+        chunks.append(TranscriptChunk(index=i, char_start=a, char_end=b, text=text[a:b], start_time=first_seg.start_time))
+
+    # Attach each timeline entry to the chunk in which its time starts
+    chunk_times = [parse_timestamp(c.start_time) for c in chunks]
+    for entry in timeline:
+        t = timeline_entry_time(entry)
+        idx = 0
+        for j, ct in enumerate(chunk_times):
+            if ct is not None and ct <= t:
+                idx = j
+        chunks[idx].timeline.append(entry)
+    return chunks
+
+
+if __name__ == "__main__":
+    print("Importing transcript_chunker.py")
@@ -0,0 +1,91 @@
+import bisect
+import re
+from typing import List, Optional, Pattern
+
+from src.mongo_schema_overwrite import TranscriptSegment
+
+# "Speaker:" / "Speaker 2:" labels as they appear in the episode transcripts
+SPEAKER_RE = re.compile(r"(?:^|(?<=\s))(Speaker(?: \d+)?):\s")
+# Inline timestamps, e.g. "[00:01:05]"
+TIMESTAMP_RE = re.compile(r"\[(\d{1,2}:\d{2}(?::\d{2})?)\]")
+# Long turns are split (at a sentence end when possible) so segments stay compact
+MAX_SEGMENT_CHARS = 1500
+_SENTENCE_END_RE = re.compile(r"[.?!]\s")
+
+
+def _split_points(text: str, start: int, end: int, max_chars: int) -> List[int]:
+    """Cut positions inside [start, end) so no piece is longer than max_chars."""
+    cuts = []
+    pos = start
+    while end - pos > max_chars:
+        window = text[pos:pos + max_chars]
+        ends = [m.end() for m in _SENTENCE_END_RE.finditer(window)]
+        cut = ends[-1] if ends else (window.rfind(" ") + 1 or max_chars)
+        pos += cut
+        cuts.append(pos)
+    return cuts
+
+
+def _trimmed(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def segment_transcript(
+    text: str,
+    *,
+    speaker_pattern: Pattern[str] = SPEAKER_RE,
+    max_chars: int = MAX_SEGMENT_CHARS,
+) -> List[TranscriptSegment]:
+    """
+    Split a cleaned transcript (clean_transcript output) into speaker turns.
+
+    Offsets index into `text` itself, so a segment can always be mapped back to
+    the stored full transcript. start_time is the last timestamp at or before
+    the segment start, or the first one inside it for the opening segment.
+    """
+    if not text:
+        return []
+
+    ts_matches = list(TIMESTAMP_RE.finditer(text))
+    ts_positions = [m.start() for m in ts_matches]
+
+    def start_time_at(char_start: int, char_end: int) -> Optional[str]:
+        i = bisect.bisect_right(ts_positions, char_start) - 1
+        if i >= 0:
+            return ts_matches[i].group(1)
+        if ts_positions and ts_positions[0] < char_end:
+            return ts_matches[0].group(1)
+        return None
+
+    # (speaker, utterance start, utterance end)
+    turns = []
+    labels = list(speaker_pattern.finditer(text))
+    if not labels or labels[0].start() > 0:
+        turns.append((None, 0, labels[0].start() if labels else len(text)))
+    for i, m in enumerate(labels):
+        end = labels[i + 1].start() if i + 1 < len(labels) else len(text)
+        turns.append((m.group(1), m.end(), end))
+
+    segments: List[TranscriptSegment] = []
+    for speaker, start, end in turns:
+        bounds = [start, *_split_points(text, start, end, max_chars), end]
+        for a, b in zip(bounds, bounds[1:]):
+            a, b = _trimmed(text, a, b)
+            if a >= b:
+                continue
+            segments.append(TranscriptSegment(
+                speaker=speaker,
+                start_time=start_time_at(a, b),
+                char_start=a,
+                char_end=b,
+                text=text[a:b],
+            ))
+    return segments
+
+
+if __name__ == "__main__":
+    print("Importing transcript_segmenter.py")
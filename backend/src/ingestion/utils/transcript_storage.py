@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import json
+import zlib
+from datetime import datetime, UTC
+from typing import List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is preferred, zlib keeps things working without it
+    zstandard = None
+
+from src.mongo_schema_overwrite import Transcript, TranscriptBody, TranscriptSegment
+from src.ingestion.utils.transcript_segmenter import segment_transcript
+
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+ZSTD_LEVEL = 10
+
+
+def compress_text(text: str) -> Tuple[str, bytes]:
+    """Return (codec, compressed UTF-8 bytes), using zstd when it is installed."""
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return CODEC_ZLIB, zlib.compress(raw, 9)
+
+
+def decompress_text(codec: str, data: bytes) -> str:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Transcript body is zstd-compressed but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown transcript codec: {codec}")
+
+
+def _encode_segments(segments: List[TranscriptSegment]) -> Tuple[str, bytes]:
+    # Text is not stored: it is a slice of the body and rebuilt on load
+    rows = [[s.speaker, s.start_time, s.char_start, s.char_end] for s in segments]
+    return compress_text(json.dumps(rows, separators=(",", ":")))
+
+
+def _decode_segments(codec: str, data: bytes, text: str) -> List[TranscriptSegment]:
+    rows = json.loads(decompress_text(codec, data))
+    return [
+        TranscriptSegment(speaker=sp, start_time=ts, char_start=a, char_end=b, text=text[a:b])
+        for sp, ts, a, b in rows
+    ]
+
+
+async def save_full_transcript(
+    transcript: Transcript,
+    text: str,
+    segments: Optional[List[TranscriptSegment]] = None,
+) -> TranscriptBody:
+    """
+    Store `text` compressed in 'transcript_bodies' and point the Transcript at it.
+    The Transcript must already be inserted; any legacy inline copy is removed.
+    Segments (speaker turns with offsets into `text`) are computed when not given
+    and stored compressed in the same body document.
+    """
+    if transcript.id is None:
+        raise ValueError("Transcript must be inserted before its body can be stored")
+
+    if segments is None:
+        segments = segment_transcript(text)
+    codec, data = compress_text(text)
+    _, segments_data = _encode_segments(segments)
+    now = datetime.now(UTC)
+    body_col = TranscriptBody.get_pymongo_collection()
+    await body_col.update_one(
+        {"transcript_id": transcript.id},
+        {
+            "$set": {
+                "codec": codec,
+                "data": data,
+                "raw_chars": len(text),
+                "compressed_bytes": len(data),
+                "segments_data": segments_data,
+                "updated_at": now,
+            },
+            "$setOnInsert": {"created_at": now},
+        },
+        upsert=True,
+    )
+    body = await TranscriptBody.find_one(TranscriptBody.transcript_id == transcript.id)
+
+    await Transcript.get_pymongo_collection().update_one(
+        {"_id": transcript.id},
+        {
+            "$set": {
+                "full_transcript_body_id": body.id,
+                "full_transcript_chars": len(text),
+                "segment_count": len(segments),
+                "updated_at": now,
+            },
+            "$unset": {"full_transcript": ""},
+        },
+    )
+    transcript.full_transcript_body_id = body.id
+    transcript.full_transcript_chars = len(text)
+    transcript.segment_count = len(segments)
+    transcript.full_transcript = None
+    return body
+
+
+async def load_full_transcript(transcript: Transcript) -> Optional[str]:
+    """Lazy accessor for the raw text: reads the side collection only when called."""
+    if transcript.full_transcript_body_id is not None:
+        body = await TranscriptBody.get(transcript.full_transcript_body_id)
+        if body is not None:
+            return decompress_text(body.codec, body.data)
+    # Not migrated yet
+    return transcript.full_transcript
+
+
+async def load_transcript_segments(transcript: Transcript) -> List[TranscriptSegment]:
+    """
+    Speaker-turn segments of the transcript. Bodies stored before segmentation
+    existed are segmented on first access and written back.
+    """
+    if transcript.full_transcript_body_id is not None:
+        body = await TranscriptBody.get(transcript.full_transcript_body_id)
+        if body is not None:
+            text = decompress_text(body.codec, body.data)
+            if body.segments_data is not None:
+                return _decode_segments(body.codec, body.segments_data, text)
+            segments = segment_transcript(text)
+            await save_full_transcript(transcript, text, segments)
+            return segments
+    if transcript.full_transcript:
+        return segment_transcript(transcript.full_transcript)
+    return []
+
+
+async def migrate_inline_transcripts(limit: Optional[int] = None) -> int:
+    """
+    Move legacy inline full_transcript strings into compressed TranscriptBody docs.
+    Safe to re-run (migrated transcripts no longer match). One-off backfill:
+
+        python -m src.ingestion.utils.transcript_storage --migrate [--limit N]
+    """
+    col = Transcript.get_pymongo_collection()
+    cursor = col.find({"full_transcript": {"$type": "string"}}, {"full_transcript": 1})
+    if limit:
+        cursor = cursor.limit(limit)
+
+    migrated = 0
+    raw_total = 0
+    compressed_total = 0
+    async for doc in cursor:
+        transcript = Transcript.model_construct(id=doc["_id"])
+        body = await save_full_transcript(transcript, doc["full_transcript"])
+        migrated += 1
+        raw_total += len(doc["full_transcript"].encode("utf-8"))
+        compressed_total += body.compressed_bytes
+
+    if migrated:
+        print(
+            f"Migrated {migrated} transcripts: {raw_total:,} bytes -> {compressed_total:,} bytes "
+            f"({compressed_total / max(raw_total, 1):.1%})"
+        )
+    else:
+        print("No inline transcripts left to migrate")
+    return migrated
+
+
+async def _migrate(limit: Optional[int]) -> int:
+    # Imported here: the graph imports this module, and the CLI alone needs Beanie set up
+    from src.config.mongo_setup import init_beanie_with_pymongo
+
+    await init_beanie_with_pymongo()
+    return await migrate_inline_transcripts(limit)
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Compressed transcript storage maintenance")
+    p.add_argument("--migrate", action="store_true",
+                   help="Move inline Transcript.full_transcript text into transcript_bodies")
+    p.add_argument("--limit", type=int, default=None, help="Migrate at most this many transcripts")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.migrate:
+        asyncio.run(_migrate(args.limit))
+    else:
+        print("Importing transcript_storage.py (pass --migrate to move inline transcripts)")
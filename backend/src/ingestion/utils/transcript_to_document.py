@@ -3,7 +3,8 @@ from config.mongo_setup import get_async_mongo_client
 import re   
 from bs4 import BeautifulSoup    
 import asyncio   
-from typing import Optional
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+from pymongo import AsyncMongoClient
 
 
 DEFAULT_HEADERS = {
@@ -24,50 +25,147 @@ DEFAULT_HEADERS = {
     "Referer": "https://daveasprey.com/",
 }
 
-async def fetch_url_async(url: str, headers: Optional[dict] = None, timeout_s: int = 30) -> str:
+async def fetch_url_async(
+    url: str,
+    headers: Optional[dict] = None,
+    timeout_s: int = 30,
+    session: Optional[aio.ClientSession] = None,
+) -> str:
+    """Fetch a page; pass `session` to reuse one connection pool across many fetches."""
     merged_headers = {**DEFAULT_HEADERS, **(headers or {})}
-    timeout = aio.ClientTimeout(total=timeout_s)
-    async with aio.ClientSession(timeout=timeout) as session:
-        async with session.get(url, headers=merged_headers, allow_redirects=True) as response:
-            text = await response.text()
-            if response.status in (403, 406) and "Forbidden" in text:
-                raise PermissionError(f"Blocked with status {response.status}")
-            return text
+    if session is None:
+        timeout = aio.ClientTimeout(total=timeout_s)
+        async with aio.ClientSession(timeout=timeout) as own_session:
+            return await fetch_url_async(url, headers, timeout_s, own_session)
+    async with session.get(url, headers=merged_headers, allow_redirects=True) as response:
+        text = await response.text()
+        if response.status in (403, 406) and "Forbidden" in text:
+            raise PermissionError(f"Blocked with status {response.status}")
+        return text
         
 
 
-async def get_transcript_url(episode_number: int) -> str: 
-    client = await get_async_mongo_client() 
-    if not client: 
-        raise Exception("Failed to connect to MongoDB") 
+async def get_transcript_url(episode_number: int, client: Optional[AsyncMongoClient] = None) -> str: 
+    """Single lookup; opens (and closes) its own client only when none is passed."""
+    own_client = client is None
+    if own_client:
+        client = await get_async_mongo_client() 
+        if not client: 
+            raise Exception("Failed to connect to MongoDB") 
     
-    db = client["biohack_agent"] 
-    collection = db["episode_urls"]  
+    try:
+        db = client["biohack_agent"] 
+        collection = db["episode_urls"]  
 
+        episode = await collection.find_one({"episode_number": episode_number})  
+        if not episode: 
+            raise Exception(f"Episode {episode_number} not found")  
+        
+        print(episode["transcript_url"])
+        
+        return episode["transcript_url"] 
+    finally:
+        if own_client:
+            await client.close()
 
-    episode = await collection.find_one({"episode_number": episode_number})  
-    if not episode: 
-        raise Exception(f"Episode {episode_number} not found")  
-    
-    print(episode["transcript_url"])
-    
-    return episode["transcript_url"] 
 
 
+def html_to_transcript_text(html_content: str) -> str:
+    soup = BeautifulSoup(html_content, "html.parser")
+    text = soup.get_text()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()  
+
 
-async def clean_transcript(transcript_url: str) -> str:
+async def clean_transcript(transcript_url: str, session: Optional[aio.ClientSession] = None) -> str:
     try:
-        html_content = await fetch_url_async(transcript_url)
+        html_content = await fetch_url_async(transcript_url, session=session)
     except PermissionError:
         try:
             from async_playwright_scraper import get_episode_html_playwright
         except Exception:
             raise
         html_content = await get_episode_html_playwright(transcript_url)
-    soup = BeautifulSoup(html_content, "html.parser")
-    text = soup.get_text()
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()  
+    return html_to_transcript_text(html_content)
+
+
+class TranscriptBatchProvider:
+    """
+    Fetch many transcripts with one Mongo query and one HTTP connection pool.
+
+    Episode numbers are resolved to transcript URLs with a single $in query on
+    the caller's (shared) client; downloads run through a bounded pool on one
+    aiohttp session and `stream()` yields (episode_number, text) as each one
+    completes. Downloads stay at most `concurrency` ahead of the consumer, so a
+    slow consumer holds a bounded number of transcripts in memory. Missing
+    episodes and failed downloads are collected in `errors` instead of
+    aborting the batch.
+    """
+
+    def __init__(
+        self,
+        client: AsyncMongoClient,
+        *,
+        db_name: str = "biohack_agent",
+        collection: str = "episode_urls",
+        concurrency: int = 8,
+        timeout_s: int = 30,
+    ):
+        self.collection = client[db_name][collection]
+        self.concurrency = concurrency
+        self.timeout_s = timeout_s
+        self.errors: Dict[int, BaseException] = {}
+
+    async def resolve_urls(self, episode_numbers: Iterable[int]) -> Dict[int, str]:
+        wanted = sorted(set(episode_numbers))
+        cursor = self.collection.find(
+            {"episode_number": {"$in": wanted}},
+            {"episode_number": 1, "transcript_url": 1, "_id": 0},
+        )
+        urls: Dict[int, str] = {}
+        async for doc in cursor:
+            if doc.get("transcript_url"):
+                urls[doc["episode_number"]] = doc["transcript_url"]
+        for n in wanted:
+            if n not in urls:
+                self.errors[n] = LookupError(f"Episode {n} not found or has no transcript_url")
+        return urls
+
+    async def stream(self, episode_numbers: Iterable[int]) -> AsyncIterator[Tuple[int, str]]:
+        urls = await self.resolve_urls(episode_numbers)
+        if not urls:
+            return
+        timeout = aio.ClientTimeout(total=self.timeout_s)
+        connector = aio.TCPConnector(limit=self.concurrency)
+        # Workers block on put() once this many finished transcripts are waiting
+        ready: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        todo = iter(urls.items())
+        async with aio.ClientSession(timeout=timeout, connector=connector) as session:
+
+            async def _worker() -> None:
+                for n, url in todo:
+                    try:
+                        text = await clean_transcript(url, session=session)
+                    except Exception as e:
+                        print(f"❌ Transcript download failed for episode {n}: {e}")
+                        self.errors[n] = e
+                        continue
+                    await ready.put((n, text))
+
+            async def _close() -> None:
+                await asyncio.gather(*workers, return_exceptions=True)
+                await ready.put(None)
+
+            workers = [asyncio.create_task(_worker()) for _ in range(min(self.concurrency, len(urls)))]
+            closer = asyncio.create_task(_close())
+            try:
+                while (item := await ready.get()) is not None:
+                    yield item
+            finally:
+                for t in (*workers, closer):
+                    t.cancel()
+                # Let them unwind before the session closes under them
+                await asyncio.gather(*workers, closer, return_exceptions=True)
 
 
 async def get_transcript_document(episode_number: int) -> str: 
@@ -75,9 +173,27 @@ async def get_transcript_document(episode_number: int) -> str:
     transcript_text = await clean_transcript(transcript_url) 
     return transcript_text   
 
-async def retrieve_transcript_documents(episode_numbers: list[int]) -> list[str]: 
-    tasks = [get_transcript_document(episode_number) for episode_number in episode_numbers] 
-    return await asyncio.gather(*tasks) 
+async def retrieve_transcript_documents(
+    episode_numbers: list[int],
+    client: Optional[AsyncMongoClient] = None,
+    concurrency: int = 8,
+) -> list[str]: 
+    """Transcripts in the order requested; raises if any could not be retrieved."""
+    own_client = client is None
+    if own_client:
+        client = await get_async_mongo_client()
+        if not client:
+            raise Exception("Failed to connect to MongoDB")
+    try:
+        provider = TranscriptBatchProvider(client, concurrency=concurrency)
+        texts = {n: text async for n, text in provider.stream(episode_numbers)}
+    finally:
+        if own_client:
+            await client.close()
+    if provider.errors:
+        n, err = next(iter(provider.errors.items()))
+        raise Exception(f"Failed to retrieve {len(provider.errors)} transcript(s); episode {n}: {err}") from err
+    return [texts[n] for n in episode_numbers]
 
 
 async def main(): 
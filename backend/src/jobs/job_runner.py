@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of an in-process job.
+
+    Values:
+        queued: Waiting for a free worker slot
+        running: Executing
+        succeeded: Finished without raising
+        failed: Raised an exception
+        cancelled: Cancelled before or while running
+    """
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+TERMINAL_STATUSES = {JobStatus.succeeded, JobStatus.failed, JobStatus.cancelled}
+
+
+class JobProgress:
+    """
+    Progress counters and event stream a long-running pipeline updates as it goes.
+
+    Pipelines accept an optional `progress` argument and call:
+      set_total(n)                  once the work list is known
+      item_started(key)             when an item begins
+      item_finished(key, error)     when it ends (error=None means ok)
+      emit(type, **data)            for anything else worth streaming
+
+    Every call is also published as an event dict to `stream()` subscribers;
+    late subscribers get the recent history replayed first.
+    """
+
+    def __init__(self, history: int = 2000) -> None:
+        self.total: Optional[int] = None
+        self.started = 0
+        self.succeeded = 0
+        self.failed = 0
+        self._started_at: Dict[Any, float] = {}
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._closed = False
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    def set_total(self, total: int) -> None:
+        self.total = total
+        self.emit("total", total=total)
+
+    def item_started(self, key: Any) -> None:
+        self.started += 1
+        self._started_at[key] = time.perf_counter()
+        self.emit("started", key=key)
+
+    def item_finished(self, key: Any, error: Optional[BaseException] = None) -> None:
+        began = self._started_at.pop(key, None)
+        elapsed_s = round(time.perf_counter() - began, 3) if began is not None else None
+        if error is None:
+            self.succeeded += 1
+            self.emit("ok", key=key, elapsed_s=elapsed_s)
+        else:
+            self.failed += 1
+            self.emit("error", key=key, elapsed_s=elapsed_s, error=f"{type(error).__name__}: {error}")
+
+    def emit(self, type: str, **data: Any) -> None:
+        event = {"type": type, "ts": datetime.now(UTC).isoformat(), **data}
+        if type in ("ok", "error"):
+            event["progress"] = self.snapshot()
+        self._history.append(event)
+        for q in self._subscribers:
+            q.put_nowait(event)
+
+    def close(self, status: str, **data: Any) -> None:
+        """Publish the final event and end every subscriber's stream."""
+        if self._closed:
+            return
+        self.emit("done", status=status, progress=self.snapshot(), **data)
+        self._closed = True
+        for q in self._subscribers:
+            q.put_nowait(None)
+
+    async def stream(self, heartbeat_s: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events as they happen until the job is closed.
+        Yields None every `heartbeat_s` of silence so callers can keep proxies alive.
+        """
+        q: asyncio.Queue = asyncio.Queue()
+        for event in self._history:
+            q.put_nowait(event)
+        if self._closed:
+            q.put_nowait(None)
+        else:
+            self._subscribers.add(q)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(q.get(), heartbeat_s)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    return
+                yield event
+        finally:
+            self._subscribers.discard(q)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "started": self.started,
+            "completed": self.completed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
+
+
+JobFn = Callable[[JobProgress], Awaitable[Any]]
+
+
+@dataclass
+class Job:
+    """One submitted job and its bookkeeping."""
+    id: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: JobStatus = JobStatus.queued
+    created_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Any = None
+    progress: JobProgress = field(default_factory=JobProgress)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status.value,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+            "progress": self.progress.snapshot(),
+        }
+
+
+class JobRunner:
+    """
+    Bounded in-process async job runner.
+
+    Jobs are asyncio tasks on the app's event loop; at most `max_workers` run
+    at once and the rest wait as `queued`. Finished jobs are kept (up to
+    `max_history`) so their status can still be polled.
+    """
+
+    def __init__(self, max_workers: int = 2, max_history: int = 200):
+        self._slots = asyncio.Semaphore(max_workers)
+        self._jobs: Dict[str, Job] = {}
+        self._max_history = max_history
+
+    def submit(self, kind: str, fn: JobFn, params: Optional[Dict[str, Any]] = None) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params or {})
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, fn), name=f"job-{kind}-{job.id}")
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in TERMINAL_STATUSES or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    async def shutdown(self) -> None:
+        """Cancel everything still queued or running and wait for it to unwind."""
+        tasks = [j.task for j in self._jobs.values() if j.task and not j.task.done()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: Job, fn: JobFn) -> None:
+        try:
+            async with self._slots:
+                job.status = JobStatus.running
+                job.started_at = datetime.now(UTC)
+                job.progress.emit("job_started", job_id=job.id, kind=job.kind)
+                job.result = await fn(job.progress)
+                job.status = JobStatus.succeeded
+        except asyncio.CancelledError:
+            job.status = JobStatus.cancelled
+        except Exception as e:
+            job.status = JobStatus.failed
+            job.error = f"{type(e).__name__}: {e}"
+            print(f"[jobs] {job.kind} {job.id} failed: {job.error}")
+        finally:
+            job.finished_at = datetime.now(UTC)
+            job.progress.close(job.status.value, job_id=job.id, error=job.error)
+
+    def _prune(self) -> None:
+        finished = [j for j in self.list() if j.status in TERMINAL_STATUSES]
+        for job in finished[self._max_history:]:
+            self._jobs.pop(job.id, None)
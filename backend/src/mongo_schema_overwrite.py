@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field, ConfigDict 
 from typing import List, Optional, Dict, Any, Literal, Union
 from datetime import datetime, UTC
-from beanie import Document, Link,  BackLink
+from beanie import Document, Link,  BackLink, PydanticObjectId
+from pymongo import IndexModel, ASCENDING
 
 
 from enum import Enum 
@@ -112,12 +113,33 @@ class TranscriptStructured(BaseModel):
         high_level_overview (Optional[Dict]): High-level overview structured data
         claims_made (Optional[Dict]): Claims structured data
         businesses (Optional[Dict]): Business-related structured data
+        compounds (Optional[Dict]): Compound structured data
+
+    Batch extraction stores each type as {"items": [entity, ...]}.
     """
     product: Optional[Dict[str, Any]] = None
     medical_treatment: Optional[Dict[str, Any]] = None
     high_level_overview: Optional[Dict[str, Any]] = None
     claims_made: Optional[Dict[str, Any]] = None
     businesses: Optional[Dict[str, Any]] = None
+    compounds: Optional[Dict[str, Any]] = None
+
+
+class TranscriptSegment(BaseModel):
+    """One speaker turn (or a slice of a long turn) of a transcript.
+
+    Fields:
+        speaker (Optional[str]): Speaker label as written in the transcript
+        start_time (Optional[str]): Timestamp (HH:MM:SS) at the start of the segment
+        char_start (int): Offset of the segment in the full transcript text
+        char_end (int): End offset (exclusive) in the full transcript text
+        text (str): Segment text, full_text[char_start:char_end]
+    """
+    speaker: Optional[str] = None
+    start_time: Optional[str] = None
+    char_start: int
+    char_end: int
+    text: str = ""
 
 
 class Transcript(BaseDoc):
@@ -132,6 +154,12 @@ class Transcript(BaseDoc):
         high_level_overview_summary (Optional[str]): High-level overview
         master_aggregate_summary (Optional[str]): Aggregate summary
         timeline (List[Dict]): Timeline of transcript events
+        full_transcript (Optional[str]): Legacy inline raw text (migrated into TranscriptBody)
+        full_transcript_body_id (Optional[PydanticObjectId]): TranscriptBody holding the compressed raw text
+        full_transcript_chars (Optional[int]): Length of the raw text
+        segment_count (Optional[int]): Number of TranscriptSegments stored with the body
+        content_hash (Optional[str]): sha256 of the normalized transcript text last summarized
+        summary_version_hash (Optional[str]): Prompt/model version hash of the last summarization
         structured (Optional[TranscriptStructured]): Structured data block
     """
     product_summary: Optional[str] = None 
@@ -143,6 +171,14 @@ class Transcript(BaseDoc):
     master_aggregate_summary: Optional[str] = None
     timeline: Optional[List[Dict[str, Any]]] = None 
     full_transcript: Optional[str] = None 
+    # Raw text lives compressed in 'transcript_bodies'; load it with
+    # src.ingestion.utils.transcript_storage.load_full_transcript
+    full_transcript_body_id: Optional[PydanticObjectId] = None
+    full_transcript_chars: Optional[int] = None
+    segment_count: Optional[int] = None
+    # Ingestion skips a transcript when both hashes match the current run
+    content_hash: Optional[str] = None
+    summary_version_hash: Optional[str] = None
 
     structured: Optional[TranscriptStructured] = None
 
@@ -150,6 +186,34 @@ class Transcript(BaseDoc):
         name = "transcripts"
 
 
+class TranscriptBody(BaseDoc):
+    """Compressed raw transcript text stored in 'transcript_bodies' collection.
+
+    Kept out of 'transcripts' so fetching a Transcript (or an Episode with
+    fetch_links=True) never pulls ~70 KB of text it does not need.
+
+    Fields:
+        transcript_id (PydanticObjectId): Owning Transcript _id (unique)
+        codec (str): Compression codec of `data` ("zstd" or "zlib")
+        data (bytes): Compressed UTF-8 transcript text
+        raw_chars (int): Length of the decompressed text
+        compressed_bytes (int): Size of `data`
+        segments_data (Optional[bytes]): Compressed JSON segment index (offsets, no text)
+    """
+    transcript_id: PydanticObjectId
+    codec: str
+    data: bytes
+    raw_chars: int
+    compressed_bytes: int
+    segments_data: Optional[bytes] = None
+
+    class Settings:
+        name = "transcript_bodies"
+        indexes = [
+            IndexModel([("transcript_id", ASCENDING)], unique=True),
+        ]
+
+
 
 # ==================================================
 # Resources
@@ -237,6 +301,7 @@ class Business(BaseDoc):
         role_or_relevance (Optional[str]): Business role/relevance
         first_timestamp (Optional[str]): First mention timestamp
         business_documents (Optional[List[str]]): Related documents
+        normalized_name (Optional[str]): Dedup key derived from canonical_name (unique)
     """
     owner: Optional[Link[Person]] = None
     biography: Optional[str] = None
@@ -247,9 +312,17 @@ class Business(BaseDoc):
     role_or_relevance: Optional[str] = None
     first_timestamp: Optional[str] = None 
     business_documents: Optional[List[str]] = None   
+    normalized_name: Optional[str] = None
 
     class Settings:
         name = "businesses"
+        indexes = [
+            IndexModel(
+                [("normalized_name", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"normalized_name": {"$type": "string"}},
+            ),
+        ]
 
 
 
@@ -268,6 +341,7 @@ class Product(BaseDoc):
         features (List[str]): Product features
         protocols (List[str]): Related protocols
         benefits_as_stated (List[str]): Claimed benefits
+        normalized_name (Optional[str]): Dedup key derived from name (unique)
     """
     name: str
     company: Optional[Link[Business]] = None            
@@ -281,9 +355,17 @@ class Product(BaseDoc):
     features: List[str] = Field(default_factory=list)
     protocols: List[str] = Field(default_factory=list)  
     benefits_as_stated: List[str] = Field(default_factory=list)
+    normalized_name: Optional[str] = None
 
     class Settings:
         name = "products"
+        indexes = [
+            IndexModel(
+                [("normalized_name", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"normalized_name": {"$type": "string"}},
+            ),
+        ]
 
 
 
@@ -300,6 +382,7 @@ class Treatment(BaseDoc):
         risks_or_contraindications (List[str]): Risks/contraindications
         confidence (Confidence): Confidence level
         biomarkers (Optional[List[Link[BioMarker]]]): Related biomarkers
+        normalized_name (Optional[str]): Dedup key derived from name (unique)
     """
     name: str
     description: Optional[str] = None
@@ -310,9 +393,17 @@ class Treatment(BaseDoc):
     risks_or_contraindications: List[str] = Field(default_factory=list)
     confidence: Confidence = Confidence.medium 
     biomarkers: Optional[List[Link[BioMarker]]] = None 
+    normalized_name: Optional[str] = None
 
     class Settings:
         name = "treatments"
+        indexes = [
+            IndexModel(
+                [("normalized_name", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"normalized_name": {"$type": "string"}},
+            ),
+        ]
 
 
 
@@ -368,6 +459,7 @@ class Claim(BaseDoc):
         transcript (Optional[Link[Transcript]]): Related transcript
         persons (List[Link[Person]]): Related persons
         products (List[Link[Product]]): Related products
+        normalized_text (Optional[str]): Dedup key derived from text (per transcript)
     """
     text: str
     description: Optional[str] = None
@@ -378,9 +470,13 @@ class Claim(BaseDoc):
     transcript: Optional[Link[Transcript]] = None
     persons: List[Link[Person]] = Field(default_factory=list)
     products: List[Link[Product]] = Field(default_factory=list)
+    normalized_text: Optional[str] = None
 
     class Settings:
         name = "claims"
+        indexes = [
+            IndexModel([("normalized_text", ASCENDING), ("transcript", ASCENDING)]),
+        ]
 
 
 
@@ -394,6 +490,7 @@ class Compound(BaseDoc):
         benefits_as_stated (List[str]): Stated benefits
         products (Optional[List[Link[Product]]]): Related products
         claims (Optional[List[Link[Claim]]]): Related claims
+        normalized_name (Optional[str]): Dedup key derived from name (unique)
     """
     name: str
     description: Optional[str] = None
@@ -402,9 +499,17 @@ class Compound(BaseDoc):
 
     products: Optional[List[Link[Product]]] = None 
     claims: Optional[List[Link[Claim]]] = None 
+    normalized_name: Optional[str] = None
 
     class Settings:
         name = "compounds"
+        indexes = [
+            IndexModel(
+                [("normalized_name", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"normalized_name": {"$type": "string"}},
+            ),
+        ]
 
 
 
@@ -438,6 +543,7 @@ class EpisodeMentions(BaseModel):
         treatments (List[Link[Treatment]]): Treatment mentions
         success_stories (List[Link[SuccessStory]]): Success story mentions
         resources (List[Link[Resource]]): Resource mentions
+        compounds (List[Link[Compound]]): Compound mentions
     """
     products: List[Link[Product]] = Field(default_factory=list)
     protocols: List[Link[Protocol]] = Field(default_factory=list)
@@ -447,6 +553,7 @@ class EpisodeMentions(BaseModel):
     treatments: List[Link[Treatment]] = Field(default_factory=list)
     success_stories: List[Link[SuccessStory]] = Field(default_factory=list)
     resources: List[Link[Resource]] = Field(default_factory=list)
+    compounds: List[Link[Compound]] = Field(default_factory=list)
 
 
 class Episode(BaseDoc):
@@ -498,6 +605,9 @@ class Episode(BaseDoc):
     timeline: Optional[List[Dict[str, Any]]] = None    
     master_summary: Optional[str] = None   
     # Use this to produce vector store embeddings 
+    # Inputs/prompt version behind master_summary; unchanged => no re-summarization
+    master_summary_content_hash: Optional[str] = None
+    master_summary_version_hash: Optional[str] = None
 
     purpose: Optional[str] = None
     participants: Optional[List[str]] = None
@@ -556,6 +666,97 @@ class MedicalTreatment(BaseDoc):
 
 
 
+
+# ==================================================
+# Pipeline bookkeeping
+# ==================================================
+
+class FailedEpisode(BaseDoc):
+    """Dead-letter entry stored in 'failed_episodes' collection.
+
+    One document per (episode_id, stage). Retry runs pick up entries whose
+    next_retry_at has passed; next_retry_at is None once attempts are exhausted.
+
+    Fields:
+        episode_id (PydanticObjectId): Failed Episode _id
+        stage (str): Pipeline stage that failed (enhancement, webpage_parse, transcript_link)
+        episode_page_url (Optional[str]): Episode page URL at failure time
+        episode_number (Optional[int]): Episode number at failure time
+        error_class (str): Exception class name of the last failure
+        error_message (Optional[str]): Exception message of the last failure
+        attempts (int): Number of failed attempts so far
+        last_failed_at (datetime): Time of the last failure
+        next_retry_at (Optional[datetime]): Earliest time for the next retry
+    """
+    episode_id: PydanticObjectId
+    stage: str
+    episode_page_url: Optional[str] = None
+    episode_number: Optional[int] = None
+    error_class: str
+    error_message: Optional[str] = None
+    attempts: int = 0
+    last_failed_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    next_retry_at: Optional[datetime] = None
+
+    class Settings:
+        name = "failed_episodes"
+        indexes = [
+            IndexModel([("episode_id", ASCENDING), ("stage", ASCENDING)], unique=True),
+            IndexModel([("stage", ASCENDING), ("next_retry_at", ASCENDING)]),
+        ]
+
+
+class EpisodePageParse(BaseDoc):
+    """Parse results of an episode page, stored in 'episode_page_parses' collection.
+
+    Written by the enhancement crawl (and the transcript-link backfill on a
+    cache miss) so later passes can reuse a page that was already fetched.
+
+    Fields:
+        episode_page_url (str): Episode page URL (unique)
+        fetched_at (datetime): When the page was fetched and parsed
+        transcript_url (Optional[str]): Extracted transcript link, None if the page has none
+        episode_number (Optional[int]): Episode number parsed from the page
+        html_chars (Optional[int]): Size of the fetched HTML
+    """
+    episode_page_url: str
+    fetched_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    transcript_url: Optional[str] = None
+    episode_number: Optional[int] = None
+    html_chars: Optional[int] = None
+
+    class Settings:
+        name = "episode_page_parses"
+        indexes = [
+            IndexModel([("episode_page_url", ASCENDING)], unique=True),
+        ]
+
+
+class EntityResolutionEntry(BaseDoc):
+    """Name variant -> canonical entity, stored in 'entity_resolution' collection.
+
+    Persisted form of the fuzzy entity-resolution index: one document per
+    (entity_type, normalized_name), so a variant resolved once ("bp coffee")
+    maps straight to its canonical document on every later ingestion.
+
+    Fields:
+        entity_type (str): products, businesses or compounds
+        normalized_name (str): Normalized name variant
+        entity_id (str): _id of the canonical Product/Business/Compound
+        signature (List[int]): MinHash signature of the name's character trigrams
+    """
+    entity_type: str
+    normalized_name: str
+    entity_id: str
+    signature: List[int] = Field(default_factory=list)
+
+    class Settings:
+        name = "entity_resolution"
+        indexes = [
+            IndexModel([("entity_type", ASCENDING), ("normalized_name", ASCENDING)], unique=True),
+        ]
+
+
  
 
 if __name__ == "__main__": 
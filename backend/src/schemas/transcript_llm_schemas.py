@@ -293,6 +293,54 @@ class CompoundOutput(BaseModel):
 
 
 
+# ========= Batch submissions (every entity of a type in one tool call) =========
+
+class ProductOutputs(BaseModel):
+    """Every product found in a summary, submitted at once.
+    
+    Fields:
+        products (List[ProductOutput]): Products
+    """
+    products: List[ProductOutput] = Field(default_factory=list)
+
+
+class TreatmentOutputs(BaseModel):
+    """Every medical treatment found in a summary, submitted at once.
+    
+    Fields:
+        treatments (List[TreatmentOutput]): Treatments
+    """
+    treatments: List[TreatmentOutput] = Field(default_factory=list)
+
+
+class ClaimOutputs(BaseModel):
+    """Every claim found in a summary, submitted at once.
+    
+    Fields:
+        claims (List[ClaimOutput]): Claims
+    """
+    claims: List[ClaimOutput] = Field(default_factory=list)
+
+
+class BusinessOutputs(BaseModel):
+    """Every business/entity found in a summary, submitted at once.
+    
+    Fields:
+        businesses (List[BusinessOutput]): Businesses
+    """
+    businesses: List[BusinessOutput] = Field(default_factory=list)
+
+
+class CompoundOutputs(BaseModel):
+    """Every compound found in a summary, submitted at once.
+    
+    Fields:
+        compounds (List[CompoundOutput]): Compounds
+    """
+    compounds: List[CompoundOutput] = Field(default_factory=list)
+
+
+
 
 class EpisodeOutput(BaseModel):
     """Pydantic output model for Episode document.
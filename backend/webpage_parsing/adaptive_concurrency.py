@@ -0,0 +1,174 @@
+# webpage_parsing/adaptive_concurrency.py
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import aiohttp
+
+# Status codes that mean "you are going too fast" rather than "this page is broken"
+CONGESTION_STATUSES = {429, 502, 503, 504}
+
+
+def is_congestion_error(exc: BaseException) -> bool:
+    """True for timeouts and throttling responses (429/5xx gateway errors)."""
+    if isinstance(exc, (asyncio.TimeoutError, aiohttp.ServerTimeoutError)):
+        return True
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in CONGESTION_STATUSES
+    return False
+
+
+def _p95(samples: Deque[Tuple[float, bool]]) -> Optional[float]:
+    latencies = sorted(lat for lat, ok in samples if ok)
+    if not latencies:
+        return None
+    idx = max(0, math.ceil(0.95 * len(latencies)) - 1)
+    return latencies[idx]
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight episodes.
+
+    Workers take a slot with `async with controller:` (or acquire/release), and
+    fetches report each attempt through record_success / record_failure.
+    Once per "round" (as many samples as the current limit) the controller:
+      - adds `increase_step` slots if p95 latency and error rate are on target
+      - multiplies the limit by `decrease_factor` if either is over target
+    Timeouts and 429s shrink the limit immediately (at most once per cooldown).
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        target_p95_s: float = 3.0,
+        max_error_rate: float = 0.05,
+        increase_step: int = 1,
+        decrease_factor: float = 0.5,
+        window: int = 100,
+        cooldown_s: float = 2.0,
+    ):
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError("require 1 <= min_limit <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_p95_s = target_p95_s
+        self.max_error_rate = max_error_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown_s = cooldown_s
+
+        self._limit = min(max(initial, min_limit), max_limit)
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._since_adjust = 0
+        self._last_decrease = 0.0
+        self._notify_task: Optional[asyncio.Task] = None
+
+        # run stats
+        self.peak_limit = self._limit
+        self.increases = 0
+        self.decreases = 0
+        self.congestion_events = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    # ---------- slot gating ----------
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    async def __aenter__(self) -> "AIMDController":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.release()
+
+    # ---------- feedback ----------
+    def record_success(self, latency_s: float) -> None:
+        self._samples.append((latency_s, True))
+        self._tick()
+
+    def record_failure(self, exc: BaseException) -> None:
+        self._samples.append((0.0, False))
+        if is_congestion_error(exc):
+            self.congestion_events += 1
+            self._decrease()
+        self._tick()
+
+    def _tick(self) -> None:
+        self._since_adjust += 1
+        # An empty window means a congestion decrease just cleared it
+        if self._since_adjust < self._limit or not self._samples:
+            return
+
+        errors = sum(1 for _, ok in self._samples if not ok)
+        error_rate = errors / len(self._samples)
+        p95 = _p95(self._samples)
+        if error_rate > self.max_error_rate or (p95 is not None and p95 > self.target_p95_s):
+            self._since_adjust = 0
+            self._decrease()
+        elif self._set_limit(self._limit + self.increase_step):
+            self._since_adjust = 0
+            self.increases += 1
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_s:
+            return
+        self._last_decrease = now
+        self._since_adjust = 0
+        # Samples from the old limit would keep the next round over target
+        self._samples.clear()
+        if self._set_limit(int(self._limit * self.decrease_factor)):
+            self.decreases += 1
+
+    def _set_limit(self, value: int) -> bool:
+        """Clamp and apply a new limit; False when it was already there."""
+        value = min(max(value, self.min_limit), self.max_limit)
+        if value == self._limit:
+            return False
+        self._limit = value
+        self.peak_limit = max(self.peak_limit, self._limit)
+        # wake waiters if we grew; shrinking takes effect as slots are released
+        if self._notify_task is None or self._notify_task.done():
+            self._notify_task = asyncio.get_running_loop().create_task(self._notify())
+        return True
+
+    async def _notify(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        errors = sum(1 for _, ok in self._samples if not ok)
+        return {
+            "limit": self._limit,
+            "in_flight": self._in_flight,
+            "peak_limit": self.peak_limit,
+            "p95_s": _p95(self._samples),
+            "error_rate": (errors / len(self._samples)) if self._samples else 0.0,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "congestion_events": self.congestion_events,
+        }
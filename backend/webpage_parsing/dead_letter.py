@@ -0,0 +1,114 @@
+# webpage_parsing/dead_letter.py
+from __future__ import annotations
+
+from datetime import datetime, timedelta, UTC
+from typing import Iterable, List, Optional, Union
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from src.mongo_schema_overwrite import FailedEpisode
+
+# Pipeline stages that can dead-letter an episode
+STAGE_ENHANCEMENT = "enhancement"            # episode_enhacement_pipeline.Enhancer
+STAGE_WEBPAGE_PARSE = "webpage_parse"        # webpage_ep_parsing.update_all_episodes
+STAGE_TRANSCRIPT_LINK = "transcript_link"    # store_transcript_links.process_single_episode
+STAGES = (STAGE_ENHANCEMENT, STAGE_WEBPAGE_PARSE, STAGE_TRANSCRIPT_LINK)
+
+RETRY_BASE_S = 300          # first retry after 5 minutes
+RETRY_MAX_S = 24 * 3600     # never wait more than a day
+MAX_ATTEMPTS = 8            # after this, next_retry_at is cleared and the entry is parked
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: base * 2^(attempts-1), capped at RETRY_MAX_S."""
+    exp = max(0, attempts - 1)
+    return timedelta(seconds=min(RETRY_BASE_S * (2 ** exp), RETRY_MAX_S))
+
+
+async def record_failure(
+    episode_id: Union[str, ObjectId, None],
+    stage: str,
+    exc: BaseException,
+    *,
+    episode_page_url: Optional[str] = None,
+    episode_number: Optional[int] = None,
+) -> Optional[FailedEpisode]:
+    """
+    Upsert the (episode_id, stage) dead-letter entry, bump its attempt count
+    and schedule the next retry. Never raises: a broken DLQ write must not
+    take the pipeline down with it.
+    """
+    if episode_id is None:
+        return None
+    try:
+        now = datetime.now(UTC)
+        col = FailedEpisode.get_pymongo_collection()
+        doc = await col.find_one_and_update(
+            {"episode_id": ObjectId(str(episode_id)), "stage": stage},
+            {
+                "$inc": {"attempts": 1},
+                "$set": {
+                    "episode_page_url": episode_page_url,
+                    "episode_number": episode_number,
+                    "error_class": type(exc).__name__,
+                    "error_message": str(exc)[:2000],
+                    "last_failed_at": now,
+                    "updated_at": now,
+                },
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        attempts = doc.get("attempts", 1)
+        next_retry_at = now + retry_delay(attempts) if attempts < MAX_ATTEMPTS else None
+        await col.update_one({"_id": doc["_id"]}, {"$set": {"next_retry_at": next_retry_at}})
+        doc["next_retry_at"] = next_retry_at
+        return FailedEpisode.model_validate(doc)
+    except Exception as e:
+        print(f"[dead_letter] Could not record {stage} failure for {episode_id}: {e}")
+        return None
+
+
+async def clear_failure(episode_id: Union[str, ObjectId, None], stage: str) -> None:
+    """Drop the dead-letter entry after a successful retry."""
+    if episode_id is None:
+        return
+    try:
+        await FailedEpisode.get_pymongo_collection().delete_one(
+            {"episode_id": ObjectId(str(episode_id)), "stage": stage}
+        )
+    except Exception as e:
+        print(f"[dead_letter] Could not clear {stage} entry for {episode_id}: {e}")
+
+
+
+async def clear_failures(episode_ids: Iterable[Union[str, ObjectId, None]], stage: str) -> int:
+    """clear_failure for many episodes in one delete_many; returns how many entries went."""
+    ids = [ObjectId(str(i)) for i in episode_ids if i is not None]
+    if not ids:
+        return 0
+    try:
+        result = await FailedEpisode.get_pymongo_collection().delete_many(
+            {"episode_id": {"$in": ids}, "stage": stage}
+        )
+        return result.deleted_count
+    except Exception as e:
+        print(f"[dead_letter] Could not clear {len(ids)} {stage} entries: {e}")
+        return 0
+
+async def due_failures(
+    stage: Optional[str] = None,
+    *,
+    limit: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> List[FailedEpisode]:
+    """Entries whose retry time has passed, oldest schedule first."""
+    query = {"next_retry_at": {"$ne": None, "$lte": now or datetime.now(UTC)}}
+    if stage:
+        query["stage"] = stage
+    cursor = FailedEpisode.find(query).sort("+next_retry_at")
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list()
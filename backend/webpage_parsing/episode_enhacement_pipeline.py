@@ -1,11 +1,10 @@
 # enhancement_pipeline.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Iterable, Union, Callable
+from typing import Any, Dict, List, Optional, Iterable, Union, Callable, Tuple
 import asyncio
-from contextlib import asynccontextmanager
+import time
 
 import aiohttp
-from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type
 from bs4 import BeautifulSoup
 
 from bson import ObjectId
@@ -15,6 +14,9 @@ from src.mongo_schema_overwrite import Episode, Resource, Person
 from firecrawl import AsyncFirecrawl
 from config.firecrawl_client import firecrawl as shared_firecrawl
 from config.settings import get_settings
+from .adaptive_concurrency import AIMDController
+from .http_client import aiohttp_session, fetch_html
+from src.jobs.job_runner import JobProgress
 
 # --- reuse your sync parsers exactly as-is:
 from .episode_summaries import (
@@ -25,33 +27,16 @@ from .episode_summaries import (
     extract_episode_number as es_extract_episode_number,
     parse_youtube_embed_url as es_parse_youtube_embed_url,
 )
-from .store_transcript_links import extract_transcript_url_enhanced
+from .store_transcript_links import extract_transcript_url_enhanced, process_single_episode
+from .webpage_ep_parsing import update_all_episodes
+from . import dead_letter
+from .page_parse_cache import page_parse_record, save_page_parses
 
 settings = get_settings()
 
 # =========================================================
-# A. Session + Helpers
+# A. Helpers (pooled session + fetch_html live in http_client.py)
 # =========================================================
-@asynccontextmanager
-async def aiohttp_session(total_timeout_s: int = 30):
-    timeout = aiohttp.ClientTimeout(total=total_timeout_s)
-    conn = aiohttp.TCPConnector(limit=100, enable_cleanup_closed=True)
-    async with aiohttp.ClientSession(timeout=timeout, connector=conn) as session:
-        yield session
-
-HEADERS = settings.web_fetch_headers
-
-@retry(
-    retry=retry_if_exception_type(aiohttp.ClientError),
-    wait=wait_exponential_jitter(initial=0.5, max=8),
-    stop=stop_after_attempt(4),
-    reraise=True,
-)
-async def fetch_html(session: aiohttp.ClientSession, url: str) -> str:
-    async with session.get(url, headers=HEADERS, allow_redirects=True) as resp:
-        resp.raise_for_status()
-        return await resp.text()
-
 async def to_thread(fn: Callable, *args, **kwargs):
     """Run a sync parser concurrently without blocking the event loop."""
     return await asyncio.to_thread(fn, *args, **kwargs)
@@ -214,8 +199,11 @@ class Enhancer:
         self,
         firecrawl_client: Optional[AsyncFirecrawl] = None,
         max_firecrawl_rps: float = 2.0,  # optional: cap QPS per worker
+        controller: Optional[AIMDController] = None,
     ):
         self.firecrawl = firecrawl_client or shared_firecrawl
+        # fetch latency/error feedback for the adaptive runner (None = fixed concurrency)
+        self.controller = controller
         # simple token-bucket via semaphore if you want a hard cap
         per_second = max(1, int(max_firecrawl_rps))
         self._firecrawl_sem = asyncio.Semaphore(per_second)
@@ -226,7 +214,7 @@ class Enhancer:
             return
 
         # Fetch once (async I/O)
-        html = await fetch_html(session, ep_url)
+        html = await fetch_html(session, ep_url, self.controller)
 
         # Fan-out: HTML parsers + Firecrawl (parallel)
         async with self._firecrawl_sem:
@@ -234,6 +222,7 @@ class Enhancer:
         parse_task = asyncio.create_task(fanout_parse_all(html))
 
         guest_name, parsed = await asyncio.gather(guest_task, parse_task)
+        await self._cache_page_parse(ep_url, html, parsed)
 
         # Fan-in: aggregate + upsert (one save)
         major = parsed.get("major_summary") or {}
@@ -292,16 +281,37 @@ class Enhancer:
 
         await episode.save()
 
+    @staticmethod
+    async def _cache_page_parse(ep_url: str, html: str, parsed: Dict[str, Any]) -> None:
+        # Lets the transcript-link backfill reuse this fetch instead of crawling again
+        try:
+            episode_number = int(parsed["episode_number"]) if parsed.get("episode_number") else None
+        except (TypeError, ValueError):
+            episode_number = None
+        await save_page_parses([
+            page_parse_record(
+                ep_url,
+                transcript_url=parsed.get("transcript_link"),
+                episode_number=episode_number,
+                html_chars=len(html),
+            )
+        ])
+
 # =========================================================
 # F. Batch runners
 # =========================================================
 async def enhance_all_episodes(
     *,
     concurrency: int = 10,
-    filter_only_missing_youtube: bool = False
+    filter_only_missing_youtube: bool = False,
+    adaptive: bool = True,
+    max_concurrency: int = 64,
+    time_budget_s: Optional[float] = None,
+    progress: Optional[JobProgress] = None,
 ) -> None:
     """
-    Process a set of episodes discovered by query.
+    Process a set of episodes discovered by query, most incomplete / newest first.
+    With adaptive=True, `concurrency` is only the starting point (see AIMDController).
     """
     await init_beanie_with_pymongo()
     enhancer = Enhancer()
@@ -331,12 +341,24 @@ async def enhance_all_episodes(
         from beanie.odm.operators.find.element import Exists
         episodes = await Episode.find(Exists(Episode.episode_page_url, True), fetch_links=True).to_list()
 
-    await _run_concurrently_over_episodes(episodes, enhancer, concurrency=concurrency)
+    await _run_concurrently_over_episodes(
+        episodes,
+        enhancer,
+        concurrency=concurrency,
+        adaptive=adaptive,
+        max_concurrency=max_concurrency,
+        time_budget_s=time_budget_s,
+        progress=progress,
+    )
 
 async def enhance_episodes_by_ids(
     episode_ids: List[Union[str, ObjectId]],
     *,
     concurrency: int = 10,
+    adaptive: bool = True,
+    max_concurrency: int = 64,
+    time_budget_s: Optional[float] = None,
+    progress: Optional[JobProgress] = None,
 ) -> None:
     """
     Process a specific list of Episode _ids (strings or ObjectIds).
@@ -357,7 +379,40 @@ async def enhance_episodes_by_ids(
     episodes = [ep for ep in episodes if getattr(ep, "episode_page_url", None)]
 
     enhancer = Enhancer()
-    await _run_concurrently_over_episodes(episodes, enhancer, concurrency=concurrency)
+    await _run_concurrently_over_episodes(
+        episodes,
+        enhancer,
+        concurrency=concurrency,
+        adaptive=adaptive,
+        max_concurrency=max_concurrency,
+        time_budget_s=time_budget_s,
+        progress=progress,
+    )
+
+# Fields enhance_one can fill in; episodes missing more of them are worth more
+ENHANCEABLE_FIELDS = (
+    "webpage_summary",
+    "sponsors",
+    "timeline",
+    "transcript_url",
+    "episode_number",
+    "youtube_embed_url",
+    "youtube_watch_url",
+    "youtube_video_id",
+    "webpage_resources",
+    "guests",
+)
+
+def _missing_field_count(episode: Episode) -> int:
+    return sum(1 for f in ENHANCEABLE_FIELDS if getattr(episode, f, None) in (None, "", []))
+
+def _priority_key(episode: Episode) -> Tuple[int, int]:
+    """Most missing fields first, then newest (highest episode_number); unknown numbers last."""
+    ep_num = episode.episode_number if episode.episode_number is not None else -1
+    return (-_missing_field_count(episode), -ep_num)
+
+def prioritize_episodes(episodes: Iterable[Episode]) -> List[Episode]:
+    return sorted(episodes, key=_priority_key)
 
 # Internal concurrent runner
 async def _run_concurrently_over_episodes(
@@ -365,18 +420,126 @@ async def _run_concurrently_over_episodes(
     enhancer: Enhancer,
     *,
     concurrency: int = 10,
+    adaptive: bool = True,
+    max_concurrency: int = 64,
+    time_budget_s: Optional[float] = None,
+    clear_dead_letters: bool = False,
+    progress: Optional[JobProgress] = None,
 ) -> None:
-    sem = asyncio.BoundedSemaphore(concurrency)
+    """
+    Dispatch episodes in priority order (see _priority_key), one per free slot.
+    When `time_budget_s` runs out no new episodes are started; in-flight ones finish.
+    Failures go to the dead-letter collection; with clear_dead_letters=True
+    (retry runs) successful episodes are removed from it.
+    """
+    if adaptive:
+        # Start at `concurrency` and let fetch latency / 429s steer the limit
+        controller = AIMDController(initial=concurrency, max_limit=max(concurrency, max_concurrency))
+    else:
+        controller = AIMDController(initial=concurrency, min_limit=concurrency, max_limit=concurrency)
+    enhancer.controller = controller
+
+    queue = prioritize_episodes(episodes)
+    if progress is not None:
+        progress.set_total(len(queue))
+    deadline = time.monotonic() + time_budget_s if time_budget_s else None
 
     async with aiohttp_session(total_timeout_s=30) as session:
         async def _one(ep: Episode):
-            async with sem:
-                try:
-                    await enhancer.enhance_one(session, ep)
-                except Exception as e:
-                    print(f"[enhancement] Failed for {getattr(ep,'id',None)}: {e}")
+            if progress is not None:
+                progress.item_started(ep.episode_number or str(ep.id))
+            try:
+                await enhancer.enhance_one(session, ep)
+                if clear_dead_letters:
+                    await dead_letter.clear_failure(ep.id, dead_letter.STAGE_ENHANCEMENT)
+                if progress is not None:
+                    progress.item_finished(ep.episode_number or str(ep.id))
+            except Exception as e:
+                print(f"[enhancement] Failed for {getattr(ep,'id',None)}: {e}")
+                if progress is not None:
+                    progress.item_finished(ep.episode_number or str(ep.id), e)
+                await dead_letter.record_failure(
+                    ep.id,
+                    dead_letter.STAGE_ENHANCEMENT,
+                    e,
+                    episode_page_url=ep.episode_page_url,
+                    episode_number=ep.episode_number,
+                )
+            finally:
+                await controller.release()
+
+        tasks: List[asyncio.Task] = []
+        try:
+            for idx, ep in enumerate(queue):
+                # Take the slot before picking the task so start order follows priority
+                await controller.acquire()
+                if deadline is not None and time.monotonic() >= deadline:
+                    await controller.release()
+                    print(f"[enhancement] Time budget reached; {len(queue) - idx} episode(s) left for the next run")
+                    break
+                tasks.append(asyncio.create_task(_one(ep)))
+
+            await asyncio.gather(*tasks)
+        finally:
+            # On cancellation (job cancel route), stop in-flight episodes before the
+            # session closes under them; CancelledError is not dead-lettered by _one
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"[enhancement] Concurrency stats: {controller.snapshot()}")
+
+async def retry_failed_episodes(
+    *,
+    stage: Optional[str] = None,
+    limit: Optional[int] = None,
+    concurrency: int = 10,
+    adaptive: bool = True,
+    max_concurrency: int = 64,
+) -> Dict[str, int]:
+    """
+    Re-run only the dead-lettered episodes whose retry time has passed.
+    Each stage is retried with the runner that failed it; successes are cleared,
+    repeated failures are rescheduled with a longer backoff.
+    Returns the number of due entries per stage.
+    """
+    client = await init_beanie_with_pymongo()
+    due = await dead_letter.due_failures(stage, limit=limit)
+    by_stage: Dict[str, List[ObjectId]] = {}
+    for entry in due:
+        by_stage.setdefault(entry.stage, []).append(entry.episode_id)
+    print(f"[retry-failed] Due entries: { {k: len(v) for k, v in by_stage.items()} }")
+
+    ids = by_stage.get(dead_letter.STAGE_ENHANCEMENT)
+    if ids:
+        episodes = await Episode.find(Episode.id.in_(ids), fetch_links=True).to_list()
+        episodes = [ep for ep in episodes if getattr(ep, "episode_page_url", None)]
+        await _run_concurrently_over_episodes(
+            episodes,
+            Enhancer(),
+            concurrency=concurrency,
+            adaptive=adaptive,
+            max_concurrency=max_concurrency,
+            clear_dead_letters=True,
+        )
 
-        await asyncio.gather(*[_one(ep) for ep in episodes])
+    ids = by_stage.get(dead_letter.STAGE_WEBPAGE_PARSE)
+    if ids:
+        episodes = await Episode.find(Episode.id.in_(ids), fetch_links=True).to_list()
+        await update_all_episodes(episodes, clear_dead_letters=True)
+
+    ids = by_stage.get(dead_letter.STAGE_TRANSCRIPT_LINK)
+    if ids:
+        raw_episodes = await client[settings.mongo_db_name or "biohack_agent"].episodes.find(
+            {"_id": {"$in": ids}}
+        ).to_list(length=None)
+        async with aiohttp_session() as session:
+            for i, ep in enumerate(raw_episodes):
+                await process_single_episode(
+                    client, ep, i, len(raw_episodes), clear_dead_letter=True, session=session
+                )
+
+    return {k: len(v) for k, v in by_stage.items()}
 
 # =========================================================
 # G. Convenience single-URL parser (no DB writes)
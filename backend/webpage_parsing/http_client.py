@@ -0,0 +1,88 @@
+# webpage_parsing/http_client.py
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type
+
+from config.settings import get_settings
+from .adaptive_concurrency import AIMDController
+
+settings = get_settings()
+
+HEADERS = settings.web_fetch_headers
+
+
+@asynccontextmanager
+async def aiohttp_session(total_timeout_s: int = 30, limit: int = 100):
+    """One pooled session per crawl; reuse it for every page instead of opening one per fetch."""
+    timeout = aiohttp.ClientTimeout(total=total_timeout_s)
+    conn = aiohttp.TCPConnector(limit=limit, enable_cleanup_closed=True)
+    async with aiohttp.ClientSession(timeout=timeout, connector=conn) as session:
+        yield session
+
+
+class HostRateLimiter:
+    """
+    Token bucket per host: `rate_per_s` sustained, up to `burst` back-to-back.
+
+    Concurrency caps how many requests are in flight; this caps how fast they
+    start, so a large worker pool still stays polite to a single site.
+    """
+
+    def __init__(self, rate_per_s: Optional[float] = None, burst: Optional[int] = None):
+        self.rate_per_s = rate_per_s or settings.web_fetch_host_rate_per_s
+        self.burst = burst or settings.web_fetch_host_burst
+        self._buckets: Dict[str, list] = {}   # host -> [tokens, last_refill]
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, url: str) -> None:
+        host = urlsplit(url).netloc.lower()
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            bucket = self._buckets.setdefault(host, [float(self.burst), time.monotonic()])
+            while True:
+                now = time.monotonic()
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_s)
+                bucket[1] = now
+                if bucket[0] >= 1:
+                    bucket[0] -= 1
+                    return
+                await asyncio.sleep((1 - bucket[0]) / self.rate_per_s)
+
+
+@retry(
+    retry=retry_if_exception_type(aiohttp.ClientError),
+    wait=wait_exponential_jitter(initial=0.5, max=8),
+    stop=stop_after_attempt(4),
+    reraise=True,
+)
+async def fetch_html(
+    session: aiohttp.ClientSession,
+    url: str,
+    controller: Optional[AIMDController] = None,
+    rate_limiter: Optional[HostRateLimiter] = None,
+    raise_for_status: bool = True,
+) -> str:
+    """Page HTML; with raise_for_status=False error pages are returned like any other body."""
+    if rate_limiter is not None:
+        await rate_limiter.acquire(url)
+    # Each retry attempt is reported so 429s/timeouts shrink concurrency right away
+    started = time.perf_counter()
+    try:
+        async with session.get(url, headers=HEADERS, allow_redirects=True) as resp:
+            if raise_for_status:
+                resp.raise_for_status()
+            html = await resp.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        if controller is not None:
+            controller.record_failure(e)
+        raise
+    if controller is not None:
+        controller.record_success(time.perf_counter() - started)
+    return html
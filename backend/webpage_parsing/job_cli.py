@@ -10,18 +10,35 @@ from typing import List
 from webpage_parsing.episode_enhacement_pipeline import (
     enhance_episodes_by_ids,
     enhance_all_episodes,
+    retry_failed_episodes,
 )
+from webpage_parsing.dead_letter import STAGES
 
 def parse_args():
     p = ArgumentParser(description="Episode enhancement job")
   
-    p.add_argument("--mode", choices=["all", "ids"], default="all")
+    p.add_argument("--mode", choices=["all", "ids", "retry-failed"], default="all")
    
     p.add_argument("--ids", help="Comma-separated Episode ObjectIds", default="")
   
-    p.add_argument("--concurrency", type=int, default=int(os.getenv("CONCURRENCY", "10")))
+    p.add_argument("--concurrency", type=int, default=int(os.getenv("CONCURRENCY", "10")),
+                   help="Starting concurrency (fixed when --no-adaptive)")
+
+    p.add_argument("--max-concurrency", type=int, default=int(os.getenv("MAX_CONCURRENCY", "64")))
+
+    p.add_argument("--no-adaptive", dest="adaptive", action="store_false",
+                   help="Disable AIMD tuning and keep --concurrency fixed")
    
+    p.add_argument("--time-budget", type=float, default=float(os.getenv("TIME_BUDGET_S", "0")) or None,
+                   help="Stop starting new episodes after this many seconds")
+
     p.add_argument("--only-missing-youtube", action="store_true")
+
+    p.add_argument("--stage", choices=STAGES, default=None,
+                   help="retry-failed: only retry this pipeline stage")
+
+    p.add_argument("--limit", type=int, default=None,
+                   help="retry-failed: max dead-letter entries to process")
     return p.parse_args()
 
 def _ids_from_env_or_arg(ids_arg: str) -> List[str]:
@@ -45,23 +62,49 @@ def _ids_from_env_or_arg(ids_arg: str) -> List[str]:
 
 def main():
     args = parse_args()
+    if args.mode == "retry-failed":
+        print(f"Retrying dead-lettered episodes stage={args.stage or 'all'} limit={args.limit} ...")
+        counts = asyncio.run(
+            retry_failed_episodes(
+                stage=args.stage,
+                limit=args.limit,
+                concurrency=args.concurrency,
+                adaptive=args.adaptive,
+                max_concurrency=args.max_concurrency,
+            )
+        )
+        print(f"Retried: {counts}")
+        return
+
     if args.mode == "ids":
         ids = _ids_from_env_or_arg(args.ids)
         if not ids:
             print("No episode IDs supplied for --mode=ids", file=sys.stderr)
             sys.exit(2)
 
-        print(f"Enhancing {len(ids)} episode(s) with concurrency={args.concurrency} ...")
-        asyncio.run(enhance_episodes_by_ids(ids, concurrency=args.concurrency))
+        print(f"Enhancing {len(ids)} episode(s) with concurrency={args.concurrency} "
+              f"adaptive={args.adaptive} ...")
+        asyncio.run(
+            enhance_episodes_by_ids(
+                ids,
+                concurrency=args.concurrency,
+                adaptive=args.adaptive,
+                max_concurrency=args.max_concurrency,
+                time_budget_s=args.time_budget,
+            )
+        )
         return
 
  
     print(f"Enhancing ALL eligible episodes with concurrency={args.concurrency} "
-          f"only_missing_youtube={args.only_missing_youtube} ...")
+          f"adaptive={args.adaptive} only_missing_youtube={args.only_missing_youtube} ...")
     asyncio.run(
         enhance_all_episodes(
             concurrency=args.concurrency,
             filter_only_missing_youtube=args.only_missing_youtube,
+            adaptive=args.adaptive,
+            max_concurrency=args.max_concurrency,
+            time_budget_s=args.time_budget,
         )
     )
 
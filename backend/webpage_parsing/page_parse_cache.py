@@ -0,0 +1,68 @@
+# webpage_parsing/page_parse_cache.py
+from __future__ import annotations
+
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from src.mongo_schema_overwrite import EpisodePageParse
+
+# Parses older than this are treated as a miss and the page is fetched again
+PAGE_PARSE_MAX_AGE = timedelta(days=7)
+
+
+def page_parse_record(
+    episode_page_url: str,
+    *,
+    transcript_url: Optional[str],
+    episode_number: Optional[int] = None,
+    html_chars: Optional[int] = None,
+) -> Dict[str, Any]:
+    return {
+        "episode_page_url": episode_page_url,
+        "transcript_url": transcript_url,
+        "episode_number": episode_number,
+        "html_chars": html_chars,
+    }
+
+
+async def save_page_parses(records: List[Dict[str, Any]]) -> None:
+    """
+    Upsert parse results keyed by episode_page_url in one unordered bulk.
+    Never raises: the cache is an optimization, not part of the pipeline's result.
+    """
+    if not records:
+        return
+    now = datetime.now(UTC)
+    ops = [
+        UpdateOne(
+            {"episode_page_url": r["episode_page_url"]},
+            {
+                "$set": {**r, "fetched_at": now, "updated_at": now},
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        )
+        for r in records
+    ]
+    try:
+        await EpisodePageParse.get_pymongo_collection().bulk_write(ops, ordered=False)
+    except Exception as e:
+        print(f"[page_parse_cache] Could not store {len(records)} page parses: {e}")
+
+
+async def load_page_parses(
+    urls: Iterable[str],
+    *,
+    max_age: Optional[timedelta] = PAGE_PARSE_MAX_AGE,
+) -> Dict[str, EpisodePageParse]:
+    """Fresh cached parses for `urls`, fetched with a single $in query."""
+    urls = [u for u in set(urls) if u]
+    if not urls:
+        return {}
+    query: Dict[str, Any] = {"episode_page_url": {"$in": urls}}
+    if max_age is not None:
+        query["fetched_at"] = {"$gte": datetime.now(UTC) - max_age}
+    parses = await EpisodePageParse.find(query).to_list()
+    return {p.episode_page_url: p for p in parses}
@@ -2,19 +2,31 @@ import asyncio
 import aiohttp
 from bs4 import BeautifulSoup
 import re
-from config.mongo_setup import get_async_mongo_client
-from pymongo import AsyncMongoClient 
+from typing import Dict, Optional
+from bson import ObjectId
+from config.mongo_setup import get_async_mongo_client, init_beanie_with_client
+from config.settings import get_settings
+from pymongo import AsyncMongoClient, UpdateOne
+from . import dead_letter
+from .http_client import HostRateLimiter, aiohttp_session, fetch_html
+from .page_parse_cache import load_page_parses, page_parse_record, save_page_parses
+from src.jobs.job_runner import JobProgress
 
+# transcript_url updates are written in bulks of this size during the backfill
+TRANSCRIPT_FLUSH_SIZE = 50
 
-async def fetch_episode_html(url: str) -> str:
-    """Fetch HTML content using aiohttp"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            return await response.text()
+
+async def fetch_episode_html(
+    url: str,
+    session: Optional[aiohttp.ClientSession] = None,
+    rate_limiter: Optional[HostRateLimiter] = None,
+) -> str:
+    """Fetch HTML content using aiohttp (reuses `session` when given); like the
+    original fetch, the body is returned whatever the status code."""
+    if session is not None:
+        return await fetch_html(session, url, rate_limiter=rate_limiter, raise_for_status=False)
+    async with aiohttp_session() as own_session:
+        return await fetch_html(own_session, url, rate_limiter=rate_limiter, raise_for_status=False)
 
 
 def extract_transcript_url_enhanced(html_content: str) -> str:
@@ -164,11 +176,36 @@ async def update_episode_transcript(async_mongo_client: AsyncMongoClient, episod
         return False
         
 
-async def process_single_episode(async_mongo_client: AsyncMongoClient, episode_data: dict, episode_index: int, total_count: int):
-    """Process a single episode to extract and store transcript URL"""
+async def process_single_episode(
+    async_mongo_client: AsyncMongoClient,
+    episode_data: dict,
+    episode_index: int,
+    total_count: int,
+    clear_dead_letter: bool = False,
+    session: Optional[aiohttp.ClientSession] = None,
+    rate_limiter: Optional[HostRateLimiter] = None,
+    pending: Optional[Dict[ObjectId, str]] = None,
+    parse_records: Optional[list] = None,
+    progress: Optional[JobProgress] = None,
+    cleared: Optional[list] = None,
+):
+    """Process a single episode to extract and store transcript URL
+
+    Exceptions are recorded in the dead-letter collection (stage transcript_link).
+    With clear_dead_letter=True (retry runs) a clean finish removes the entry,
+    including "no transcript on the page", which is not worth retrying.
+
+    The backfill workers pass `pending` (the URL is buffered there for a bulk
+    write instead of updated right away), `parse_records` (the page parse is
+    recorded for page_parse_cache), `cleared` (the episode id is buffered for
+    one dead-letter delete_many per flush) and `progress`.
+    """
     
     episode_number = episode_data.get('episode_number', 'Unknown')
     episode_url = episode_data.get('episode_page_url', '')
+    key = episode_data.get('episode_number') or str(episode_data.get('_id'))
+    if progress is not None:
+        progress.item_started(key)
     
     print(f"\n🎯 Episode {episode_index + 1}/{total_count} - Episode #{episode_number}")
     print(f"   URL: {episode_url}")
@@ -176,45 +213,106 @@ async def process_single_episode(async_mongo_client: AsyncMongoClient, episode_d
     
     if not episode_url:
         print("   ❌ No episode URL found")
+        if progress is not None:
+            progress.item_finished(key, LookupError("no episode URL"))
         return False
     
     try:
         # Fetch HTML content
         print("   📄 Fetching episode HTML...")
-        html_content = await fetch_episode_html(episode_url)
+        html_content = await fetch_episode_html(episode_url, session, rate_limiter)
         print(f"   ✅ Got HTML content ({len(html_content):,} characters)")
         
-        # Extract transcript URL using enhanced method with fallback
+        # Extract transcript URL using enhanced method with fallback (off the event loop)
         print("   🔍 Extracting transcript URL (with fallback)...")
-        transcript_url = extract_transcript_url_enhanced(html_content)
+        transcript_url = await asyncio.to_thread(extract_transcript_url_enhanced, html_content)
+        if parse_records is not None:
+            parse_records.append(page_parse_record(
+                episode_url,
+                transcript_url=transcript_url,
+                episode_number=episode_data.get('episode_number'),
+                html_chars=len(html_content),
+            ))
         
-        if transcript_url:
+        if transcript_url and pending is not None:
+            print("   💾 Queued for bulk update")
+            pending[episode_data['_id']] = transcript_url
+            success = True
+        elif transcript_url:
             # Update MongoDB document
             print("   💾 Updating MongoDB...")
             success = await update_episode_transcript(async_mongo_client, episode_data, transcript_url)
-            return success
         else:
             print("   ❌ No transcript URL found with any method")
-            return False
+            success = False
+
+        if clear_dead_letter and cleared is not None:
+            cleared.append(episode_data.get('_id'))
+        elif clear_dead_letter:
+            await dead_letter.clear_failure(episode_data.get('_id'), dead_letter.STAGE_TRANSCRIPT_LINK)
+        if progress is not None:
+            progress.item_finished(key, None if success else LookupError("no transcript URL found"))
+        return success
             
     except Exception as e:
         print(f"   ❌ Error processing episode {episode_number}: {e}")
+        if progress is not None:
+            progress.item_finished(key, e)
+        await dead_letter.record_failure(
+            episode_data.get('_id'),
+            dead_letter.STAGE_TRANSCRIPT_LINK,
+            e,
+            episode_page_url=episode_url,
+            episode_number=episode_data.get('episode_number'),
+        )
         return False
 
 
-async def process_all_missing_transcripts(async_mongo_client: AsyncMongoClient, limit: int = None):
+async def flush_transcript_updates(async_mongo_client: AsyncMongoClient, pending: Dict[ObjectId, str]) -> int:
+    """Write buffered {episode _id: transcript_url} pairs in one unordered bulk; returns matched count"""
+    if not pending:
+        return 0
+    collection = async_mongo_client.biohack_agent.episodes
+    ops = [UpdateOne({"_id": _id}, {"$set": {"transcript_url": url}}) for _id, url in pending.items()]
+    result = await collection.bulk_write(ops, ordered=False)
+    print(f"   💾 Bulk-updated {result.matched_count} transcript URLs ({result.modified_count} changed)")
+    return result.matched_count
+
+
+async def process_all_missing_transcripts(
+    async_mongo_client: AsyncMongoClient,
+    limit: int = None,
+    progress: JobProgress = None,
+    workers: Optional[int] = None,
+    clear_dead_letters: bool = True,
+):
     """
     Process ALL episodes with missing transcript URLs using enhanced extraction
     
+    Pages the enhancement crawl already parsed (episode_page_parses, see
+    page_parse_cache) are answered from that cache. Only misses are fetched, by
+    a bounded pool of workers sharing one pooled session and a per-host rate
+    limiter; extraction runs off the event loop and transcript_url updates are
+    written in bulks of TRANSCRIPT_FLUSH_SIZE.
+
     Args:
         limit: Optional limit for number of episodes to process (if None, processes ALL)
+        progress: Optional JobProgress updated per episode (background job runner)
+        workers: Concurrent fetches (defaults to settings.transcript_backfill_workers)
+        clear_dead_letters: Remove transcript_link dead-letter entries of episodes that finish cleanly
+            (one delete_many per flush)
     """
+    workers = workers or get_settings().transcript_backfill_workers
     
     print("🚀 COMPREHENSIVE TRANSCRIPT URL EXTRACTION")
     print("=" * 80)
     print("🎯 Target: Episodes with missing transcript URLs")
     print("🔧 Method: Enhanced extraction with text + regex fallback")
+    print(f"⚙️ Workers: {workers}")
     print("=" * 80)
+
+    # Beanie backs the dead-letter collection used for failed episodes
+    await init_beanie_with_client(async_mongo_client)
     
     # Get all episodes with missing transcript URLs
     episodes = await get_episodes_missing_transcripts(async_mongo_client, limit)
@@ -224,19 +322,84 @@ async def process_all_missing_transcripts(async_mongo_client: AsyncMongoClient,
         print("   All episodes already have transcript URLs.")
         return
     
-    # Process each episode
-    success_count = 0
     total_count = len(episodes)
-    
     print(f"\n📋 Processing {total_count} episodes...")
-    
-    for i, episode in enumerate(episodes):
-        success = await process_single_episode(async_mongo_client, episode, i, total_count)
-        if success:
-            success_count += 1
-        
-        # Add a small delay to be nice to the server
-        await asyncio.sleep(0.5)
+    if progress is not None:
+        progress.set_total(total_count)
+
+    pending: Dict[ObjectId, str] = {}
+    parse_records: list = []
+    cleared: list = []
+    flush_lock = asyncio.Lock()
+    rate_limiter = HostRateLimiter()
+    success_count = 0
+
+    # Cache hits from the enhancement crawl skip the fetch entirely
+    cached = await load_page_parses(ep.get('episode_page_url') for ep in episodes)
+    queue: asyncio.Queue = asyncio.Queue()
+    cache_hits = 0
+    for episode in episodes:
+        hit = cached.get(episode.get('episode_page_url'))
+        if hit is None:
+            queue.put_nowait(episode)
+            continue
+        cache_hits += 1
+        key = episode.get('episode_number') or str(episode.get('_id'))
+        if progress is not None:
+            progress.item_started(key)
+        if hit.transcript_url:
+            pending[episode['_id']] = hit.transcript_url
+        if progress is not None:
+            progress.item_finished(key, None if hit.transcript_url else LookupError("no transcript URL found (cached)"))
+    print(f"   🗃️ {cache_hits} episodes answered from cached page parses, {queue.qsize()} to fetch")
+
+    async def _flush():
+        """Bulk-write what is buffered; entries leave the buffers only once written."""
+        nonlocal success_count
+        async with flush_lock:
+            batch = dict(pending)
+            records = list(parse_records)
+            success_count += await flush_transcript_updates(async_mongo_client, batch)
+            for _id, url in batch.items():
+                if pending.get(_id) == url:
+                    del pending[_id]
+            # Workers only append, so the written records are still the first ones
+            del parse_records[:len(records)]
+            await save_page_parses(records)
+            ids = list(cleared)
+            del cleared[:len(ids)]
+            await dead_letter.clear_failures(ids, dead_letter.STAGE_TRANSCRIPT_LINK)
+
+    async def _worker(session: aiohttp.ClientSession):
+        while True:
+            try:
+                episode = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            index = total_count - queue.qsize() - 1
+            await process_single_episode(
+                async_mongo_client,
+                episode,
+                index,
+                total_count,
+                clear_dead_letter=clear_dead_letters,
+                session=session,
+                rate_limiter=rate_limiter,
+                pending=pending,
+                parse_records=parse_records,
+                progress=progress,
+                cleared=cleared,
+            )
+            if len(pending) >= TRANSCRIPT_FLUSH_SIZE or len(parse_records) >= TRANSCRIPT_FLUSH_SIZE:
+                try:
+                    await _flush()
+                except Exception as e:
+                    # Buffers are kept; the next (or final) flush writes them
+                    print(f"   ⚠️ Bulk transcript update failed, will retry: {e}")
+
+    async with aiohttp_session(limit=workers) as session:
+        await asyncio.gather(*(_worker(session) for _ in range(min(workers, total_count))))
+    await _flush()
     
     # Final summary
     print("\n" + "=" * 80)
@@ -10,6 +10,7 @@ from .store_transcript_links import extract_transcript_url_enhanced
 from firecrawl import AsyncFirecrawl  
 from config.firecrawl_client import firecrawl  
 from config.mongo_setup import init_beanie_with_pymongo 
+from . import dead_letter
 
 # Reuse the robust parsers implemented elsewhere
 from .episode_summaries import (
@@ -311,9 +312,15 @@ async def update_episodes_guest_and_youtube() -> None:
             continue
 
 
-async def update_all_episodes(episodes_to_update: Union[List[Episode], None] = None) -> None:
+async def update_all_episodes(
+    episodes_to_update: Union[List[Episode], None] = None,
+    *,
+    clear_dead_letters: bool = False,
+) -> None:
     """
     Streams episodes that have an episode_page_url.
+    Failed episodes are recorded in the dead-letter collection (stage webpage_parse);
+    with clear_dead_letters=True successful ones are removed from it.
     For each episode:
       - parse page
       - update Episode.webpage_summary (from minor_summary)
@@ -396,11 +403,19 @@ async def update_all_episodes(episodes_to_update: Union[List[Episode], None] = N
 
             await episode.save()
 
-          
+            if clear_dead_letters:
+                await dead_letter.clear_failure(episode.id, dead_letter.STAGE_WEBPAGE_PARSE)
 
         except Exception as e:
-            # Keep the loop going; you might also want to log this or push to an "errors" array on the episode
+            # Keep the loop going; the dead-letter entry schedules a targeted retry
             print(f"[update_all_episodes] Failed for episode {getattr(episode, 'id', None)}: {e}")
+            await dead_letter.record_failure(
+                getattr(episode, "id", None),
+                dead_letter.STAGE_WEBPAGE_PARSE,
+                e,
+                episode_page_url=getattr(episode, "episode_page_url", None),
+                episode_number=getattr(episode, "episode_number", None),
+            )
             continue
 
 